@@ -0,0 +1,182 @@
+import re
+import json
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import scraper
+from scraper import *
+from coordination import use_shared_rate_limit_from_env
+
+################################################################################################################################################
+# ENDPOINTS
+################################################################################################################################################
+# Every endpoint receives the query parameters ({name: value}) and returns a JSON serializable object.
+# ValueError -> 400 (bad request / not found on FBref), RuntimeError -> 502 (FBref unreachable).
+
+def _require(params, key):
+    """Returns a mandatory query parameter."""
+    value = params.get(key, "").strip()
+    if not value:
+        raise ValueError(f"Missing parameter '{key}'.")
+    return value
+
+# Player pages accepted in url=: nothing else is fetched on behalf of a caller
+PLAYER_PATH_RE = re.compile(r"^/en/players/[0-9a-f]{8}/[^/]+$")
+
+def _player_url(params):
+    """Returns the player URL given directly (url=...) or found by name (name=...)."""
+    if params.get("url"):
+        base = urlparse(scraper.BASE)
+        parsed = urlparse(params["url"].strip())
+        if parsed.scheme != base.scheme or parsed.netloc != base.netloc or not PLAYER_PATH_RE.match(parsed.path):
+            raise ValueError(f"Invalid player URL : expected {scraper.BASE}/en/players/<id>/<name>.")
+        return f"{scraper.BASE}{parsed.path}"
+    _, chosen = fbref_search(_require(params, "name"))["players"][0]
+    return chosen
+
+def _fetch(url):
+    status, html = fetch_page(url)
+    if status != 200 or not html:
+        raise RuntimeError(f"HTTP error {status} while downloading {url}.")
+    return html
+
+def _player_stats(player_url, params, comparison=False):
+    """
+    Extracts the statistics selected by the comp, type, season and stats
+    (comma-separated) parameters. A comparison skips the stats its charts drop.
+    """
+    comp = params.get("comp", "all")
+    stat_type = params.get("type", "standard")
+    season = params.get("season") or None
+    stats = [s.strip() for s in params["stats"].split(",") if s.strip()] if params.get("stats") else None
+
+    if comparison:
+        projection = StatProjection.for_comparison(stat_type, stats)
+    else:
+        projection = StatProjection(stats=stats) if stats else None
+
+    comp_url, _ = get_competition_url(player_url, comp)
+    table_id = get_table_id_for_type(stat_type, comp)
+    return extract_player_stats_by_competition(_fetch(comp_url), table_id, season=season, projection=projection)
+
+def search_endpoint(params):
+    name, url = fbref_search(_require(params, "name"))["players"][0]
+    return {"name": name, "url": url}
+
+def player_endpoint(params):
+    player_url = _player_url(params)
+    return extract_player_info(_fetch(player_url), player_url, params.get("name", ""))
+
+def stats_endpoint(params):
+    player_url = _player_url(params)
+    return {"url": player_url, "stats": _player_stats(player_url, params)}
+
+def passport_endpoint(params):
+    player_url = _player_url(params)
+    player_info = extract_player_info(_fetch(player_url), player_url, params.get("name", ""))
+    passport_html, passport_path = generate_player_passeport(player_info, inline_photo=True)
+    return {"path": passport_path, "html": passport_html}
+
+def compare_endpoint(params):
+    names = [n.strip() for n in _require(params, "names").split(",") if n.strip()]
+    if len(names) != 2:
+        raise ValueError("Exactly two player names separated by commas are required.")
+    # Every season merged in one comparison would be wrong: a season is required, as in the CLI and the app
+    season = _require(params, "season")
+
+    stats_list = []
+    for name in names:
+        _, player_url = fbref_search(name)["players"][0]
+        stats_list.append(extract_core_stats(_player_stats(player_url, params, comparison=True), name))
+
+    chart_function = compare_players_radar_chart if params.get("chart") == "radar" else compare_players_chart
+    fig = chart_function(stats_list, season, params.get("comp", "all"), params.get("type", "standard"))
+    return {
+        "players": stats_list,
+        "figure": json.loads(fig.to_json()) if fig is not None else None
+    }
+
+def health_endpoint(params):
+    with PAGE_CACHE_LOCK:
+        cached_pages = len(PAGE_CACHE)
+    return {"status": "ok", "cached_pages": cached_pages, "table_schemas": dict(SCHEMA_REGISTRY.stats),
+            "rejected_pages": dict(PAGE_REJECTS)}
+
+ENDPOINTS = {
+    "/search": search_endpoint,
+    "/player": player_endpoint,
+    "/stats": stats_endpoint,
+    "/passport": passport_endpoint,
+    "/compare": compare_endpoint,
+    "/health": health_endpoint,
+}
+
+################################################################################################################################################
+# HTTP SERVER
+################################################################################################################################################
+
+class APIRequestHandler(BaseHTTPRequestHandler):
+    """Dispatches GET requests to ENDPOINTS and answers in JSON."""
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        endpoint = ENDPOINTS.get(parsed.path.rstrip("/") or "/health")
+        if endpoint is None:
+            self._send_json(404, {"error": f"Unknown endpoint '{parsed.path}'."})
+            return
+
+        params = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        try:
+            self._send_json(200, endpoint(params))
+        except ValueError as ve:
+            self._send_json(400, {"error": str(ve)})
+        except RuntimeError as e:
+            self._send_json(502, {"error": str(e)})
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        print(f"🌐 {self.address_string()} - {format % args}")
+
+def create_server(host="127.0.0.1", port=8000):
+    """
+    Creates the API server. Each request is handled in its own thread;
+    the cloudscraper session, the page cache and the rate budget of the
+    scraper module are shared by all of them.
+    """
+    return ThreadingHTTPServer((host, port), APIRequestHandler)
+
+def start_server_in_thread(host="127.0.0.1", port=0):
+    """Starts the server in a background thread (port 0 = any free port). Useful for local tests."""
+    server = create_server(host, port)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP API for the FBref scraper")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Listening address")
+    parser.add_argument("--port", type=int, default=8000, help="Listening port")
+    args = parser.parse_args()
+
+    use_shared_rate_limit_from_env()
+    server = create_server(args.host, args.port)
+    print(f"✅ API listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 API stopped.")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
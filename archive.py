@@ -0,0 +1,98 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import zstandard
+
+################################################################################################################################################
+# RAW PAGE ARCHIVE
+################################################################################################################################################
+# Every downloaded page is kept compressed (zstd) under objects/<hash[:2]>/<hash>.zst, where the hash is the
+# sha256 of the html: a page downloaded twice without change is stored once.
+# index.db records each download: url, fetch time, hash and size.
+
+class PageArchive:
+    """
+    Content-addressed, compressed store of the raw pages, indexed by URL and fetch time.
+    """
+    def __init__(self, root="output/archive", level=10):
+        self.root = root
+        self.level = level
+        self._init_lock = threading.Lock()
+        self._ready = False
+
+    def _connect(self):
+        with self._init_lock:
+            if not self._ready:
+                os.makedirs(os.path.join(self.root, "objects"), exist_ok=True)
+                conn = sqlite3.connect(os.path.join(self.root, "index.db"), timeout=30)
+                with conn:
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS pages (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            url TEXT NOT NULL,
+                            fetched_at REAL NOT NULL,
+                            hash TEXT NOT NULL,
+                            size INTEGER NOT NULL
+                        )""")
+                    conn.execute("CREATE INDEX IF NOT EXISTS pages_url ON pages (url, fetched_at)")
+                conn.close()
+                self._ready = True
+        return sqlite3.connect(os.path.join(self.root, "index.db"), timeout=30)
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.zst")
+
+    def store(self, url, html, fetched_at=None):
+        """Archives a page and returns its hash."""
+        data = html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+
+        conn = self._connect()
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(zstandard.ZstdCompressor(level=self.level).compress(data))
+            os.replace(tmp_path, path)
+
+        with conn:
+            conn.execute(
+                "INSERT INTO pages (url, fetched_at, hash, size) VALUES (?, ?, ?, ?)",
+                (url, fetched_at or time.time(), digest, len(data))
+            )
+        conn.close()
+        return digest
+
+    def load(self, digest):
+        """Returns the html of an archived page."""
+        with open(self._object_path(digest), "rb") as f:
+            return zstandard.ZstdDecompressor().decompress(f.read()).decode("utf-8")
+
+    def latest(self, url):
+        """Returns the html of the last download of the url, or None."""
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT hash FROM pages WHERE url = ? ORDER BY fetched_at DESC LIMIT 1", (url,)
+        ).fetchone()
+        conn.close()
+        return self.load(row[0]) if row else None
+
+    def entries(self, url_like="%", latest_only=True):
+        """
+        Lists the archived downloads as (url, fetched_at, hash) tuples.
+        url_like is a SQL LIKE pattern; latest_only keeps the last download of each url.
+        """
+        conn = self._connect()
+        if latest_only:
+            rows = conn.execute(
+                "SELECT url, MAX(fetched_at), hash FROM pages WHERE url LIKE ? GROUP BY url ORDER BY url", (url_like,)
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                "SELECT url, fetched_at, hash FROM pages WHERE url LIKE ? ORDER BY url, fetched_at", (url_like,)
+            ).fetchall()
+        conn.close()
+        return rows
@@ -0,0 +1,75 @@
+import os
+import re
+import sys
+import glob
+import time
+import argparse
+from archive import PageArchive
+from scraper import *
+
+################################################################################################################################################
+# CORPUS
+################################################################################################################################################
+# Player pages (https://fbref.com/en/players/<id>/<name>) read from the page archive or from a folder of .html files.
+
+PLAYER_PAGE_RE = re.compile(r"/en/players/[^/]+/[^/]+$")
+
+def archived_player_pages(archive_root=ARCHIVE_DIR, limit=None):
+    """Returns the last archived version of every player page as (url, html) tuples."""
+    archive = PageArchive(archive_root)
+    pages = []
+    for url, _, digest in archive.entries("%/en/players/%"):
+        if PLAYER_PAGE_RE.search(url) and parse_competition_url(url) is None:
+            pages.append((url, archive.load(digest)))
+            if limit and len(pages) >= limit:
+                break
+    return pages
+
+def folder_player_pages(html_dir, limit=None):
+    """Returns the .html files of a folder as (path, html) tuples."""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(html_dir, "*.html")))[:limit]:
+        with open(path, encoding="utf-8") as f:
+            pages.append((path, f.read()))
+    return pages
+
+################################################################################################################################################
+# BENCHMARK
+################################################################################################################################################
+
+def benchmark_player_info(pages, repeat=3):
+    """
+    Runs extract_player_info over the corpus `repeat` times.
+    Returns (pages per second, MB of html per second, number of typed fields found).
+    """
+    total_bytes = sum(len(html) for _, html in pages)
+    typed_found = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for url, html in pages:
+            info = extract_player_info(html, url, "")
+            typed_found += sum(info.get(k) is not None for k in ("birth_date", "height_cm", "weight_kg", "wage_amount"))
+    elapsed = time.perf_counter() - start
+    return len(pages) * repeat / elapsed, total_bytes * repeat / elapsed / 1e6, typed_found // repeat
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of extract_player_info over a corpus of player pages")
+    parser.add_argument("--archive", type=str, default=ARCHIVE_DIR, help="Archive folder to read the player pages from")
+    parser.add_argument("--html-dir", type=str, default=None, help="Folder of saved player pages (.html) used instead of the archive")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of pages")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of passes over the corpus")
+    args = parser.parse_args()
+
+    pages = folder_player_pages(args.html_dir, args.limit) if args.html_dir else archived_player_pages(args.archive, args.limit)
+    if not pages:
+        print("⚠️ No player page found in the corpus.")
+        sys.exit(1)
+
+    pages_per_sec, mb_per_sec, typed_found = benchmark_player_info(pages, args.repeat)
+    print(f"📄 {len(pages)} player pages, {args.repeat} passes")
+    print(f"✅ {pages_per_sec:.1f} pages/s ({1000 / pages_per_sec:.2f} ms/page, {mb_per_sec:.1f} MB/s)")
+    print(f"🔎 {typed_found} typed fields found (birth date, height, weight, wage)")
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,493 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import argparse
+import threading
+import scraper
+from scraper import *
+
+################################################################################################################################################
+# BACKENDS
+################################################################################################################################################
+# A backend stores the shared state of a crawl run by several processes or machines:
+#   - the work items (player URL, competition, stat type...) with their lease,
+#   - the next free request slot of the global rate budget.
+# Every backend exposes the same methods: enqueue, lease, renew, complete, fail, counts, reserve_slot.
+# renew, complete and fail only apply while the caller still holds the lease (same owner, not expired) and
+# return False otherwise: the item was handed out again to another worker, whose result wins.
+
+class SQLiteBackend:
+    """
+    Coordination state in a SQLite file. Transactions take the database lock,
+    so several processes of the same machine can share it safely.
+    """
+    def __init__(self, path="output/crawl.db", max_attempts=3):
+        self.path = path
+        self.max_attempts = max_attempts
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS work_items (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    lease_owner TEXT,
+                    lease_expires REAL,
+                    last_error TEXT
+                )""")
+            conn.execute("CREATE TABLE IF NOT EXISTS rate_state (key TEXT PRIMARY KEY, next_slot REAL NOT NULL)")
+
+    def _connect(self):
+        # One connection per call: connections cannot be shared between threads
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return _Transaction(conn)
+
+    def enqueue(self, payloads):
+        with self._connect() as conn:
+            conn.executemany("INSERT INTO work_items (payload) VALUES (?)", [(json.dumps(p),) for p in payloads])
+        return len(payloads)
+
+    def lease(self, worker_id, lease_sec):
+        """Hands out the next queued (or expired) item as (item_id, payload), or None."""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, payload FROM work_items "
+                "WHERE status = 'queued' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY id LIMIT 1", (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE work_items SET status = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1 WHERE id = ?",
+                (worker_id, now + lease_sec, row[0])
+            )
+        return row[0], json.loads(row[1])
+
+    # Condition of the updates made by the lease holder
+    _HELD = "id = ? AND lease_owner = ? AND status = 'leased' AND lease_expires > ?"
+
+    def renew(self, item_id, worker_id, lease_sec):
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"UPDATE work_items SET lease_expires = ? WHERE {self._HELD}",
+                (now + lease_sec, item_id, worker_id, now)
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, item_id, worker_id):
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"UPDATE work_items SET status = 'done', lease_owner = NULL WHERE {self._HELD}",
+                (item_id, worker_id, time.time())
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, item_id, worker_id, error):
+        """Re-queues the item, or marks it failed once max_attempts is reached."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE work_items SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+                f"lease_owner = NULL, last_error = ? WHERE {self._HELD}",
+                (self.max_attempts, str(error), item_id, worker_id, time.time())
+            )
+        return cursor.rowcount == 1
+
+    def counts(self):
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM work_items GROUP BY status").fetchall())
+
+    def reserve_slot(self, interval, key="global", priority=PRIORITY_INTERACTIVE, min_share=0):
+        """
+        Reserves the next request slot of the global budget and returns the time to wait for it,
+        or None when a lower priority request has to give way (see SHARED_SLOTS_AHEAD).
+        """
+        now = time.time()
+        ahead = SHARED_SLOTS_AHEAD.get(priority, 0)
+        with self._connect() as conn:
+            row = conn.execute("SELECT next_slot FROM rate_state WHERE key = ?", (key,)).fetchone()
+            next_slot = row[0] if row else now
+            # The row "<key>:<priority>" holds the last slot granted to that priority
+            share_key = f"{key}:{priority}"
+            if ahead is not None and next_slot > now + ahead * interval:
+                last = conn.execute("SELECT next_slot FROM rate_state WHERE key = ?", (share_key,)).fetchone()
+                if not min_share or (last and now - last[0] < interval / min_share):
+                    return None
+            slot = max(now, next_slot)
+            conn.execute("INSERT OR REPLACE INTO rate_state (key, next_slot) VALUES (?, ?)", (key, slot + interval))
+            if ahead is not None:
+                conn.execute("INSERT OR REPLACE INTO rate_state (key, next_slot) VALUES (?, ?)", (share_key, slot))
+        return slot - now
+
+class _Transaction:
+    """Runs the statements of a `with` block in one write transaction (BEGIN IMMEDIATE)."""
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.conn.close()
+
+class RedisBackend:
+    """
+    Coordination state in Redis, for workers spread over several machines.
+    The rate budget is computed with the Redis server clock, so the workers'
+    clocks do not need to be synchronised. Requires the `redis` package.
+    """
+    # KEYS[1] next slot, KEYS[2] last slot of the priority; ARGV[1] interval, ARGV[2] slots ahead (-1: no limit), ARGV[3] min share
+    _RESERVE_SLOT_SCRIPT = """
+        local t = redis.call('TIME')
+        local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+        local interval = tonumber(ARGV[1])
+        local ahead = tonumber(ARGV[2])
+        local next_slot = tonumber(redis.call('GET', KEYS[1]) or '0')
+        if ahead >= 0 and next_slot > now + ahead * interval then
+            local share = tonumber(ARGV[3])
+            local last = redis.call('GET', KEYS[2])
+            if share <= 0 or (last and now - tonumber(last) < interval / share) then return false end
+        end
+        local slot = math.max(now, next_slot)
+        redis.call('SET', KEYS[1], tostring(slot + interval))
+        if ahead >= 0 then redis.call('SET', KEYS[2], tostring(slot)) end
+        return tostring(slot - now)
+    """
+
+    # KEYS[1] owners, KEYS[2] leases; ARGV[1] item id, ARGV[2] worker id, ARGV[3] current time
+    _HELD = """
+        if redis.call('HGET', KEYS[1], ARGV[1]) ~= ARGV[2] then return 0 end
+        local expires = redis.call('ZSCORE', KEYS[2], ARGV[1])
+        if not expires or tonumber(expires) <= tonumber(ARGV[3]) then return 0 end
+    """
+    # ARGV[4] new expiry
+    _RENEW_SCRIPT = _HELD + """
+        redis.call('ZADD', KEYS[2], ARGV[4], ARGV[1])
+        return 1
+    """
+    # KEYS[3] items, KEYS[4] attempts, KEYS[5] done counter
+    _COMPLETE_SCRIPT = _HELD + """
+        redis.call('ZREM', KEYS[2], ARGV[1])
+        redis.call('HDEL', KEYS[1], ARGV[1])
+        redis.call('HDEL', KEYS[3], ARGV[1])
+        redis.call('HDEL', KEYS[4], ARGV[1])
+        redis.call('INCR', KEYS[5])
+        return 1
+    """
+    # KEYS[3] attempts, KEYS[4] failed, KEYS[5] queue; ARGV[4] max attempts, ARGV[5] error
+    _FAIL_SCRIPT = _HELD + """
+        redis.call('ZREM', KEYS[2], ARGV[1])
+        redis.call('HDEL', KEYS[1], ARGV[1])
+        if tonumber(redis.call('HGET', KEYS[3], ARGV[1]) or '0') >= tonumber(ARGV[4]) then
+            redis.call('HSET', KEYS[4], ARGV[1], ARGV[5])
+        else
+            redis.call('RPUSH', KEYS[5], ARGV[1])
+        end
+        return 1
+    """
+
+    def __init__(self, url="redis://localhost:6379/0", prefix="fbref", max_attempts=3):
+        import redis
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self.max_attempts = max_attempts
+        self._reserve_slot = self.client.register_script(self._RESERVE_SLOT_SCRIPT)
+        self._renew = self.client.register_script(self._RENEW_SCRIPT)
+        self._complete = self.client.register_script(self._COMPLETE_SCRIPT)
+        self._fail = self.client.register_script(self._FAIL_SCRIPT)
+
+    def _key(self, name):
+        return f"{self.prefix}:{name}"
+
+    def enqueue(self, payloads):
+        pipe = self.client.pipeline()
+        for payload in payloads:
+            item_id = uuid.uuid4().hex
+            pipe.hset(self._key("items"), item_id, json.dumps(payload))
+            pipe.rpush(self._key("queue"), item_id)
+        pipe.execute()
+        return len(payloads)
+
+    def lease(self, worker_id, lease_sec):
+        # Put the expired leases back in the queue first
+        now = time.time()
+        for item_id in self.client.zrangebyscore(self._key("leases"), "-inf", now):
+            if self.client.zrem(self._key("leases"), item_id):
+                self.client.lpush(self._key("queue"), item_id)
+
+        item_id = self.client.lpop(self._key("queue"))
+        if item_id is None:
+            return None
+        pipe = self.client.pipeline()
+        pipe.zadd(self._key("leases"), {item_id: now + lease_sec})
+        pipe.hset(self._key("owners"), item_id, worker_id)
+        pipe.hincrby(self._key("attempts"), item_id, 1)
+        pipe.hget(self._key("items"), item_id)
+        payload = pipe.execute()[-1]
+        return item_id, json.loads(payload)
+
+    def renew(self, item_id, worker_id, lease_sec):
+        now = time.time()
+        keys = [self._key("owners"), self._key("leases")]
+        return bool(self._renew(keys=keys, args=[item_id, worker_id, now, now + lease_sec]))
+
+    def complete(self, item_id, worker_id):
+        keys = [self._key(name) for name in ("owners", "leases", "items", "attempts", "done")]
+        return bool(self._complete(keys=keys, args=[item_id, worker_id, time.time()]))
+
+    def fail(self, item_id, worker_id, error):
+        keys = [self._key(name) for name in ("owners", "leases", "attempts", "failed", "queue")]
+        return bool(self._fail(keys=keys, args=[item_id, worker_id, time.time(), self.max_attempts, str(error)]))
+
+    def counts(self):
+        return {
+            "queued": self.client.llen(self._key("queue")),
+            "leased": self.client.zcard(self._key("leases")),
+            "done": int(self.client.get(self._key("done")) or 0),
+            "failed": self.client.hlen(self._key("failed")),
+        }
+
+    def reserve_slot(self, interval, key="global", priority=PRIORITY_INTERACTIVE, min_share=0):
+        ahead = SHARED_SLOTS_AHEAD.get(priority, 0)
+        keys = [self._key(f"rate:{key}"), self._key(f"rate:{key}:{priority}")]
+        wait = self._reserve_slot(keys=keys, args=[interval, -1 if ahead is None else ahead, min_share])
+        return None if wait is None else float(wait)
+
+def open_backend(location):
+    """Opens a backend from a location: 'redis://...' or the path of a SQLite file."""
+    if str(location).startswith(("redis://", "rediss://")):
+        return RedisBackend(location)
+    return SQLiteBackend(location)
+
+################################################################################################################################################
+# GLOBAL RATE BUDGET
+################################################################################################################################################
+
+# Priorities across processes. A slot is reserved at most this many slots ahead of the current one
+# (None: no limit), so bulk workers never book the budget far ahead and an interactive request of any
+# process waits at most for one reserved slot. A priority with a minimum share still gets a slot
+# every interval / share seconds, even while interactive requests keep the budget busy.
+SHARED_SLOTS_AHEAD = {PRIORITY_INTERACTIVE: None, PRIORITY_BULK: 1, PRIORITY_PREFETCH: 0}
+
+class SharedRateLimiter:
+    """
+    Same interface as scraper.RateLimiter, but the request slots are
+    reserved in the backend: all the workers together respect `interval`.
+    Bulk and prefetch requests wait for a slot they are allowed to reserve
+    (see SHARED_SLOTS_AHEAD), polling every poll_sec seconds.
+    """
+    def __init__(self, backend, interval=RATE_SEC, min_shares=None, poll_sec=None):
+        self.backend = backend
+        self.interval = interval
+        self.min_shares = {PRIORITY_BULK: 0.2} if min_shares is None else dict(min_shares)
+        self.poll_sec = poll_sec or max(interval / 4, 0.05)
+
+    def acquire(self, priority=None, give_way=None):
+        priority = priority or PRIORITY_INTERACTIVE
+        while True:
+            wait = self.backend.reserve_slot(self.interval, priority=priority, min_share=self.min_shares.get(priority, 0))
+            if wait is not None:
+                break
+            # A more urgent request of this process goes first
+            if give_way is not None and give_way():
+                return False
+            time.sleep(self.poll_sec)
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+def use_shared_rate_limit(backend, interval=RATE_SEC):
+    """
+    Makes every fetch_page of this process use the global rate budget of the
+    backend. Local priorities still apply to the slots this process obtains.
+    """
+    scraper.RATE_LIMITER = PriorityRateLimiter(interval, inner=SharedRateLimiter(backend, interval))
+    return scraper.RATE_LIMITER
+
+# Opt-in for the other entry points (CLI, API, Streamlit app): SQLite file or redis:// URL of the shared budget
+RATE_BACKEND_ENV = "FBREF_RATE_BACKEND"
+_ENV_RATE_BACKEND = None
+_ENV_RATE_LOCK = threading.Lock()
+
+def use_shared_rate_limit_from_env(interval=RATE_SEC):
+    """
+    Installs the global rate budget of the backend named by the FBREF_RATE_BACKEND
+    environment variable, so that the process shares its budget with the workers.
+    Does nothing when the variable is not set; safe to call several times
+    (Streamlit reruns). Returns the backend or None.
+    """
+    global _ENV_RATE_BACKEND
+    location = os.environ.get(RATE_BACKEND_ENV)
+    if not location:
+        return None
+    with _ENV_RATE_LOCK:
+        if _ENV_RATE_BACKEND is None:
+            _ENV_RATE_BACKEND = open_backend(location)
+            use_shared_rate_limit(_ENV_RATE_BACKEND, interval)
+            print(f"✅ Shared rate budget : {location}")
+    return _ENV_RATE_BACKEND
+
+################################################################################################################################################
+# WORKERS
+################################################################################################################################################
+
+def make_work_items(player_urls, scopes=("all",), stat_type="standard", season=None, stats=None):
+    """
+    Builds one work item per player and competition scope.
+    stats: optional list of the stats to extract (see StatProjection), every stat by default.
+    """
+    return [
+        {"player_url": url, "comp": scope, "type": stat_type, "season": season, "stats": stats}
+        for url in player_urls
+        for scope in scopes
+    ]
+
+def player_name_for_url(player_url):
+    """
+    Name of the player as shown on the player page, so that the CSV files have the
+    same name as those of the CLI and reparse.py; the URL slug with spaces when the
+    page cannot be read. The page is shared through the cache by the items of a player.
+    """
+    slug = player_url.rstrip("/").split("/")[-1]
+    status, html = fetch_page(player_url, priority=PRIORITY_BULK)
+    if status == 200 and html:
+        name = extract_player_info(html, player_url, "").get("name")
+        if name and name != "Name not found":
+            return name
+    return slug.replace("-", " ")
+
+def process_work_item(item):
+    """Default handler: fetches, extracts and saves the statistics described by a work item."""
+    comp_url, _ = get_competition_url(item["player_url"], item["comp"])
+    table_id = get_table_id_for_type(item["type"], item["comp"])
+
+    status, html = fetch_page(comp_url, priority=PRIORITY_BULK)
+    if status != 200 or not html:
+        raise RuntimeError(f"HTTP error {status} while downloading {comp_url}.")
+
+    projection = StatProjection(stats=item["stats"]) if item.get("stats") else None
+    stats = extract_player_stats_by_competition(html, table_id, season=item.get("season"), projection=projection)
+    player_name = player_name_for_url(item["player_url"])
+    return save_season_stats_to_csv(stats, player_name=player_name, season=item.get("season"), comp=item["comp"], type=item["type"])
+
+class LeaseHeartbeat:
+    """
+    Renews the lease of a work item every lease_sec / 3 seconds in a background
+    thread while the handler runs, so that a long item is not handed out again.
+    `lost` is set once the lease could not be renewed.
+    """
+    def __init__(self, backend, item_id, worker_id, lease_sec):
+        self.backend = backend
+        self.item_id = item_id
+        self.worker_id = worker_id
+        self.lease_sec = lease_sec
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.lease_sec / 3):
+            try:
+                renewed = self.backend.renew(self.item_id, self.worker_id, self.lease_sec)
+            except Exception as e:
+                print(f"⚠️ Lease of work item {self.item_id} not renewed : {e}")
+                continue
+            if not renewed:
+                self.lost.set()
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+
+def run_worker(backend, handler=process_work_item, worker_id=None, lease_sec=300, idle_sec=5, stop_when_empty=True):
+    """
+    Leases work items from the backend and runs the handler on them until the
+    queue is empty (or forever with stop_when_empty=False). The lease is renewed
+    while the handler runs. A failed item is re-queued for another worker; an
+    item whose worker died is handed out again once its lease expires, and the
+    late result of a worker that lost its lease is dropped.
+    Returns the number of items processed by this worker.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}"
+    processed = 0
+
+    while True:
+        leased = backend.lease(worker_id, lease_sec)
+        if leased is None:
+            if stop_when_empty:
+                return processed
+            time.sleep(idle_sec)
+            continue
+
+        item_id, item = leased
+        try:
+            with LeaseHeartbeat(backend, item_id, worker_id, lease_sec):
+                handler(item)
+        except Exception as e:
+            print(f"❌ Work item {item_id} failed : {e}")
+            if not backend.fail(item_id, worker_id, e):
+                print(f"⚠️ Lease of work item {item_id} lost, failure not recorded.")
+        else:
+            if backend.complete(item_id, worker_id):
+                processed += 1
+            else:
+                print(f"⚠️ Lease of work item {item_id} lost, result left to the new owner.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl coordination for several FBref workers")
+    parser.add_argument("command", choices=["enqueue", "worker", "status"], help="Action to run")
+    parser.add_argument("--backend", type=str, default="output/crawl.db", help="SQLite file or redis:// URL shared by the workers")
+    parser.add_argument("--players", type=str, help="File with one player URL per line (enqueue)")
+    parser.add_argument("--scopes", type=str, default="all", help="Comma-separated competitions (enqueue)")
+    parser.add_argument("--type", type=str, default="standard", help="Type of statistics (enqueue)")
+    parser.add_argument("--season", type=str, default=None, help="Season or season range (enqueue)")
+    parser.add_argument("--stats", type=str, default=None, help="Comma-separated stats to extract, e.g. 'Gls,Ast,xG' (enqueue, every stat by default)")
+    parser.add_argument("--threads", type=int, default=1, help="Worker threads in this process (worker)")
+    parser.add_argument("--rate", type=float, default=RATE_SEC, help="Global delay between requests, for all workers")
+    args = parser.parse_args()
+
+    backend = open_backend(args.backend)
+
+    if args.command == "enqueue":
+        if not args.players:
+            print("⚠️ The enqueue command needs --players.")
+            return 1
+        with open(args.players, encoding="utf-8") as f:
+            urls = [line.strip() for line in f if line.strip()]
+        scopes = [s.strip() for s in args.scopes.split(",") if s.strip()]
+        stats = [s.strip() for s in args.stats.split(",") if s.strip()] if args.stats else None
+        count = backend.enqueue(make_work_items(urls, scopes, args.type, args.season, stats))
+        print(f"✅ {count} work items queued.")
+
+    elif args.command == "worker":
+        # The workers always share the budget of their queue backend
+        use_shared_rate_limit(backend, args.rate)
+        threads = [threading.Thread(target=run_worker, args=(backend,)) for _ in range(args.threads)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        print(f"✅ Queue empty : {backend.counts()}")
+
+    else:
+        print(backend.counts())
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,6 +1,8 @@
 import streamlit as st
 import pandas as pd
 from scraper import *
+from jobs import JobQueue, run_passport_job, run_analysis_job, run_compare_job
+from coordination import use_shared_rate_limit_from_env
 import os
 
 # Competition mapping
@@ -25,6 +27,47 @@ type_map = {
 
 st.set_page_config(page_title="FBref Scraper", page_icon="⚽", layout="wide")
 
+# Background jobs shared by every session: one pool, one fetch budget
+@st.cache_resource
+def get_job_queue():
+    use_shared_rate_limit_from_env()
+    return JobQueue(max_workers=4)
+
+job_queue = get_job_queue()
+
+# Prefetching the other competition pages spends fetch budget on pages that may never be viewed: opt-in
+PREFETCH_ENV = "FBREF_PREFETCH"
+prefetch = st.sidebar.checkbox(
+    "Prefetch the other competitions",
+    value=os.environ.get(PREFETCH_ENV, "").lower() in ("1", "true", "yes"),
+    help="Downloads in the background the competition pages likely to be requested next.",
+)
+
+@st.fragment(run_every="1s")
+def job_progress(job_key):
+    """Shows the progress of a background job and refreshes the page once it is finished."""
+    job = job_queue.get(st.session_state.get(job_key))
+    if job is None:
+        return
+    if job.finished:
+        st.rerun()
+
+    st.progress(job.progress, text=f"⚙️ {job.name} : {job.step}...")
+    if st.button("Cancel", key=f"{job_key}_cancel"):
+        job.cancel()
+        st.rerun()
+
+def current_job(job_key):
+    """Returns the job stored for this form, displaying its progress while it runs."""
+    job = job_queue.get(st.session_state.get(job_key))
+    if job is not None and not job.finished:
+        job_progress(job_key)
+        return None
+    if job is not None and job.status == "cancelled":
+        st.info("Request cancelled.")
+        return None
+    return job
+
 # Custom CSS for buttons in forms
 st.markdown("""
 <style>
@@ -63,28 +106,16 @@ with tab_passport:
                 st.warning("⚠️ Please enter a player name.")
                 st.stop()
         
-            # Player search
-            with st.spinner(f"Search for player {name_passport} on FBref..."):
-                try:
-                    results = fbref_search(name_passport)
-                except Exception as e:
-                    st.error(f"Error during search : {e}")
-                    st.stop()
-
-            if not results.get("players"):
-                st.error("⚠️ No player found on FBref")
-                st.stop()
-
-            # Player page found
-            _, chosen = results["players"][0]
-            st.success(f"✅ Player found : {name_passport}")
-            
-            with st.spinner("📄 Extracting player information..."):
-                code, html = fetch_page(chosen)
-                player_info = extract_player_info(html, chosen, name_passport)
-                passport_html, passport_path = generate_player_passeport(player_info)
+            job = job_queue.submit(f"Passport of {name_passport}", run_passport_job, name_passport, prefetch=prefetch)
+            st.session_state["passport_job"] = job.id
 
-            st.components.v1.html(passport_html, height=600, scrolling=True)
+    job = current_job("passport_job")
+    if job is not None:
+        if job.status == "failed":
+            st.error(f"Error during passport generation : {job.error}")
+        else:
+            st.success(f"✅ Player found : {job.result['name']}")
+            st.components.v1.html(job.result["passport_html"], height=600, scrolling=True)
 
 with tab_single_player_analysis:
     st.header("Single Player Analysis")
@@ -123,29 +154,19 @@ with tab_single_player_analysis:
             st.warning("⚠️ Please select a type of statistics.")
             st.stop()
 
-        # Player search
-
-        with st.spinner("📊 Data extraction..."):
-            try:
-                results = fbref_search(name_single)
-                _, chosen = results["players"][0]
-                comp_key = comp_map[comp_single]
-                type_key = type_map[stats_type_single]
-
-                table_id = get_table_id_for_type(type_key, comp_key)
-                comp_url, _ = get_competition_url(chosen, comp_key)
-                code_comp, html_comp = fetch_page(comp_url)
-                stats = extract_player_stats_by_competition(
-                    html_comp,
-                    table_id,
-                    season=None if season_single.lower() == "all" else season_single
-                )
-            except Exception as e:
-                st.error(f"Error extracting statistics : {e}")
-                st.stop()
+        job = job_queue.submit(
+            f"Analysis of {name_single}", run_analysis_job,
+            name_single, season_single, comp_map[comp_single], type_map[stats_type_single], prefetch=prefetch
+        )
+        st.session_state["analysis_job"] = job.id
 
-            # Save CSV
-            csv_path = save_season_stats_to_csv(stats, player_name=name_single, season=season_single, comp=comp_single, type=type_key)
+    job = current_job("analysis_job")
+    if job is not None:
+        if job.status == "failed":
+            st.error(f"Error extracting statistics : {job.error}")
+        else:
+            stats = job.result["stats"]
+            csv_path = job.result["csv_path"]
 
             st.subheader("📊 Data table")
             if not stats or "message" in stats:
@@ -231,34 +252,23 @@ with tab_compare:
             st.warning("⚠️ Please select a type of statistics.")
             st.stop()
 
-        all_stats = []
-        
-        for name in player_list:
-            with st.spinner(f"⚙️ Data Extraction..."):
-                try:
-                    results = fbref_search(name)
-                    _, chosen = results["players"][0]
-                    comp_key = comp_map[comp_compare]
-                    type_key = type_map[stats_type_compare]
-                    comp_url, _ = get_competition_url(chosen, comp_key)
-                    code_comp, html_comp = fetch_page(comp_url)
-
-                    table_id = get_table_id_for_type(type_key, comp_key)
-
-                    stats = extract_player_stats_by_competition(
-                        html_comp, table_id, season=season_compare
-                    )
-                    
-                    core_stats = extract_core_stats(stats, name)
-                    all_stats.append(core_stats)
-                except Exception as e:
-                    st.error(f"Error processing {name}: {e}")
-                    st.stop()
-                    
-        st.session_state["compare_stats"] = all_stats
-        st.session_state["compare_season"] = season_compare
-        st.session_state["compare_comp"] = comp_key
-        st.session_state["compare_type"] = type_key
+        job = job_queue.submit(
+            "Comparison", run_compare_job,
+            player_list, season_compare, comp_map[comp_compare], type_map[stats_type_compare], prefetch=prefetch
+        )
+        st.session_state["compare_job"] = job.id
+
+    job = current_job("compare_job")
+    if job is not None:
+        if job.status == "failed":
+            st.error(f"Error processing the comparison : {job.error}")
+        elif st.session_state.get("compare_job_shown") != job.id:
+            st.session_state["compare_stats"] = job.result["compare_stats"]
+            st.session_state["compare_season"] = job.result["season"]
+            st.session_state["compare_comp"] = job.result["comp"]
+            st.session_state["compare_type"] = job.result["type"]
+            st.session_state["compare_reference"] = job.result.get("reference", {})
+            st.session_state["compare_job_shown"] = job.id
                 
             
     if "compare_stats" in st.session_state:
@@ -286,6 +296,9 @@ with tab_compare:
         else:
             st.plotly_chart(fig)
 
+        for player, version in st.session_state.get("compare_reference", {}).items():
+            st.caption(f"ℹ️ Statistics of {player} read from the reference dataset ({version}).")
+
 # Footer
 st.markdown(
     """
@@ -0,0 +1,218 @@
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from scraper import *
+from reference import reference_core_stats
+
+################################################################################################################################################
+# JOB QUEUE
+################################################################################################################################################
+
+class JobCancelled(Exception):
+    """Raised inside a job when it has been cancelled by the user."""
+
+class Job:
+    """
+    A unit of work executed by the JobQueue.
+    The job function reports its progress through report(), which is also the
+    point where a cancellation is taken into account.
+    """
+    def __init__(self, name, steps):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.steps = list(steps)
+        self.status = "queued"  # queued, running, done, failed, cancelled
+        self.step = "queued"
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self._cancel_event = threading.Event()
+        self._future = None
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed", "cancelled")
+
+    def report(self, step, progress=None):
+        """
+        Records the current step (e.g. "search", "fetch", "parse", "render").
+        Without an explicit progress, it is deduced from the position of the step.
+        """
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+        self.step = step
+        if progress is not None:
+            self.progress = progress
+        elif step in self.steps:
+            self.progress = self.steps.index(step) / len(self.steps)
+
+    def cancel(self):
+        """Asks the job to stop. A queued job is dropped before it starts."""
+        self._cancel_event.set()
+        if self._future is not None and self._future.cancel():
+            self._finish("cancelled")
+
+    def _finish(self, status, result=None, error=None):
+        self.status = status
+        self.result = result
+        self.error = error
+        if status == "done":
+            self.progress = 1.0
+        self.step = status
+        self.finished_at = time.time()
+
+class JobQueue:
+    """
+    Runs jobs on a pool of background threads.
+    All jobs share the rate budget of scraper.RATE_LIMITER, whoever submitted them.
+    Finished jobs are kept (up to max_finished) so that their results survive
+    a rerun of the Streamlit script.
+    """
+    def __init__(self, max_workers=4, max_finished=200):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fbref-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.max_finished = max_finished
+
+    def submit(self, name, func, *args, steps=("search", "fetch", "parse", "render"), **kwargs):
+        """
+        Queues func(job, *args, **kwargs) and returns the Job.
+        """
+        job = Job(name, steps)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        job._future = self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.created_at)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+        return job
+
+    def _run(self, job, func, args, kwargs):
+        if job._cancel_event.is_set():
+            job._finish("cancelled")
+            return
+        job.status = "running"
+        try:
+            result = func(job, *args, **kwargs)
+        except JobCancelled:
+            job._finish("cancelled")
+        except Exception as e:
+            job._finish("failed", error=str(e))
+        else:
+            job._finish("done", result=result)
+
+    def _prune(self):
+        # Drop the oldest finished jobs beyond max_finished
+        finished = sorted((job for job in self._jobs.values() if job.finished), key=lambda job: job.finished_at)
+        for job in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job.id]
+
+################################################################################################################################################
+# WORKFLOWS
+################################################################################################################################################
+
+def _search_player(job, name, prefetch=False, skip=()):
+    """
+    Resolves a player name to the URL of the player page.
+    With prefetch, the competition pages likely to be requested next (except
+    those in skip, fetched by the caller) are warmed in the background.
+    """
+    job.report("search")
+    results = fbref_search(name)
+    if not results.get("players"):
+        raise ValueError("⚠️ No player found on FBref")
+    _, chosen = results["players"][0]
+    if prefetch:
+        prefetch_player_pages(chosen, skip=skip)
+    return chosen
+
+def run_passport_job(job, name, prefetch=False):
+    """Search, fetch, parse and render the passport of a player."""
+    chosen = _search_player(job, name, prefetch)
+
+    job.report("fetch")
+    status, html = fetch_page(chosen)
+    if status != 200 or not html:
+        raise RuntimeError(f"HTTP error {status} while downloading the player page.")
+
+    job.report("parse")
+    player_info = extract_player_info(html, chosen, name)
+
+    job.report("render")
+    passport_html, passport_path = generate_player_passeport(player_info, inline_photo=True)
+    return {"name": name, "passport_html": passport_html, "passport_path": passport_path}
+
+def run_analysis_job(job, name, season, comp_key, type_key, prefetch=False):
+    """Search, fetch, parse and save the statistics of a player for one competition."""
+    chosen = _search_player(job, name, prefetch, skip=(comp_key,))
+
+    job.report("fetch")
+    table_id = get_table_id_for_type(type_key, comp_key)
+    comp_url, _ = get_competition_url(chosen, comp_key)
+    status, html_comp = fetch_page(comp_url)
+    if status != 200 or not html_comp:
+        raise RuntimeError(f"HTTP error {status} while downloading the competition page.")
+
+    job.report("parse")
+    # "All" in the app means every season
+    season_param = None if season.lower() == "all" else season
+    stats = extract_player_stats_by_competition(html_comp, table_id, season=season_param)
+
+    job.report("render")
+    csv_path = save_season_stats_to_csv(stats, player_name=name, season=season_param, comp=comp_key, type=type_key)
+    return {"stats": stats, "csv_path": csv_path}
+
+def run_compare_job(job, names, season, comp_key, type_key, prefetch=False):
+    """
+    Search, fetch and parse the statistics of several players to compare them.
+    The players read from the reference dataset are listed in the "reference"
+    entry of the result (name -> version of the dataset).
+    """
+    all_stats = []
+    from_reference = {}
+    table_id = get_table_id_for_type(type_key, comp_key)
+    # Only the stats shown by the comparison charts are read
+    projection = StatProjection.for_comparison(type_key)
+
+    for i, name in enumerate(names):
+        # Each player takes an equal share of the progress bar
+        share = 1 / len(names)
+        job.report("search", progress=i * share)
+        chosen = fbref_search(name)["players"][0][1]
+        if prefetch:
+            prefetch_player_pages(chosen, skip=(comp_key,))
+
+        # Rows of the shared reference dataset need no request
+        reference = reference_core_stats(chosen, name, season, comp_key, type_key)
+        if reference is not None:
+            core_stats, from_reference[name] = reference
+            all_stats.append(core_stats)
+            continue
+
+        job.report("fetch", progress=(i + 0.33) * share)
+        comp_url, _ = get_competition_url(chosen, comp_key)
+        status, html_comp = fetch_page(comp_url)
+        if status != 200 or not html_comp:
+            raise RuntimeError(f"HTTP error {status} while downloading the page of {name}.")
+
+        job.report("parse", progress=(i + 0.66) * share)
+        stats = extract_player_stats_by_competition(html_comp, table_id, season=season, projection=projection)
+        all_stats.append(extract_core_stats(stats, name))
+
+    job.report("render", progress=1.0)
+    return {"compare_stats": all_stats, "season": season, "comp": comp_key, "type": type_key, "reference": from_reference}
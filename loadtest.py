@@ -0,0 +1,304 @@
+import io
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from PIL import Image
+import scraper
+from scraper import *
+from jobs import run_passport_job, run_analysis_job, run_compare_job
+
+################################################################################################################################################
+# STAND-IN FBREF SERVER
+################################################################################################################################################
+# Serves synthetic pages with the structure the extractors expect (search results, #meta block, stats tables
+# of every type and competition), after a configurable latency.
+
+STAT_TYPES = ["standard", "shooting", "passing", "pass_types", "da", "g&s", "goalkeeping"]
+SEASONS = ["2020-2021", "2021-2022", "2022-2023", "2023-2024", "2024-2025"]
+
+def _player(i):
+    return f"p{i:04d}", f"Player-{i:04d}", f"Player {i:04d}"
+
+def _stats_table(table_id, rng):
+    head = (
+        '<thead><tr><th colspan="5"></th><th colspan="3">Playing Time</th><th colspan="4">Performance</th></tr>'
+        "<tr><th>Season</th><th>Age</th><th>Squad</th><th>Country</th><th>Comp</th><th>MP</th><th>Starts</th><th>Min</th>"
+        "<th>Gls</th><th>Ast</th><th>G+A</th><th>PK</th></tr></thead>"
+    )
+    rows = []
+    for age, season in enumerate(SEASONS, start=20):
+        mp, gls, ast = rng.randint(5, 38), rng.randint(0, 25), rng.randint(0, 15)
+        rows.append(
+            f"<tr><th>{season}</th><td>{age}</td><td>Club</td><td>es ESP</td><td>1. La Liga</td><td>{mp}</td>"
+            f"<td>{rng.randint(0, mp)}</td><td>{mp * rng.randint(30, 90):,}</td><td>{gls}</td><td>{ast}</td>"
+            f"<td>{gls + ast}</td><td>{rng.randint(0, 5)}</td></tr>"
+        )
+    foot = "<tfoot><tr><th>5 Seasons</th><td>1 Club</td><td></td><td></td><td>120</td><td>100</td><td>9,000</td><td>50</td><td>30</td><td>80</td><td>6</td></tr></tfoot>"
+    return f'<table id="{table_id}">{head}<tbody>{"".join(rows)}</tbody>{foot}</table>'
+
+def _page(body, padding_kb):
+    # FBref pages are large: the padding reproduces their size
+    padding = "<!-- " + "x" * 1024 * padding_kb + " -->" if padding_kb else ""
+    return f"<!DOCTYPE html><html><head><title>FBref</title></head><body>{body}{padding}</body></html>"
+
+def make_page(path, query, padding_kb=0):
+    """Returns the synthetic html of a FBref path, or None if the path is unknown."""
+    parts = path.strip("/").split("/")
+
+    if path.startswith("/search/"):
+        name = query.get("search", [""])[0]
+        i = int(name.split()[-1]) if name.split() and name.split()[-1].isdigit() else 0
+        player_id, slug, full_name = _player(i)
+        return _page(f'<div class="search-item"><a href="/en/players/{player_id}/{slug}">{full_name}</a></div>', padding_kb)
+
+    if len(parts) == 4 and parts[1] == "players":
+        player_id, slug = parts[2], parts[3]
+        return _page(
+            f'<div id="meta"><div class="media-item"><img src="/req/{player_id}.jpg"></div>'
+            f"<h1><span>{slug.replace('-', ' ')}</span></h1>"
+            f"<p><strong>{slug.replace('-', ' ')} Junior</strong></p>"
+            "<p><strong>Position:</strong> FW-MF (AM, right) ▪ <strong>Footed:</strong> Left</p>"
+            "<p><strong>Born:</strong> July 13, 2000 in Barcelona, Spain</p>"
+            "<p><strong>National Team:</strong> Spain</p><p><strong>Club:</strong> Club</p>"
+            "<p><strong>Wages:</strong> €1,000,000 Annual. Contract.</p></div>",
+            padding_kb
+        )
+
+    if len(parts) == 5 and parts[1] == "players":
+        parsed = parse_competition_url(path)
+        if parsed is None:
+            return None
+        rng = random.Random(path)
+        tables = "".join(_stats_table(get_table_id_for_type(t, parsed[2]), rng) for t in STAT_TYPES)
+        return _page(tables, padding_kb)
+
+    return None
+
+def _photo_bytes():
+    buffer = io.BytesIO()
+    Image.new("RGB", (300, 300), (30, 90, 160)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+class StandInHandler(BaseHTTPRequestHandler):
+    latency = 0.1
+    jitter = 0.0
+    padding_kb = 0
+    photo = None
+
+    def do_GET(self):
+        time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        parsed = urlparse(self.path)
+
+        if parsed.path.endswith(".jpg"):
+            body, content_type = self.photo, "image/jpeg"
+        else:
+            html = make_page(parsed.path, parse_qs(parsed.query), self.padding_kb)
+            if html is None:
+                self.send_error(404)
+                return
+            body, content_type = html.encode("utf-8"), "text/html; charset=utf-8"
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stand_in_server(latency=0.1, jitter=0.0, padding_kb=0):
+    """Starts the stand-in server on a free local port and returns it."""
+    handler = type("Handler", (StandInHandler,), {
+        "latency": latency, "jitter": jitter, "padding_kb": padding_kb, "photo": _photo_bytes()
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+################################################################################################################################################
+# WORKFLOWS
+################################################################################################################################################
+# The same job functions as the Streamlit app, without the progress reporting.
+
+class _NoProgress:
+    steps = ()
+    def report(self, step, progress=None):
+        pass
+
+def passport_workflow(rng, players):
+    run_passport_job(_NoProgress(), _player(rng.randrange(players))[2])
+
+def analysis_workflow(rng, players):
+    comp = rng.choice(["all", "dl", "dc", "ic", "nt"])
+    run_analysis_job(_NoProgress(), _player(rng.randrange(players))[2], rng.choice(SEASONS), comp, rng.choice(STAT_TYPES[:-1]))
+
+def comparison_workflow(rng, players):
+    names = [_player(i)[2] for i in rng.sample(range(players), 2)]
+    result = run_compare_job(_NoProgress(), names, rng.choice(SEASONS), rng.choice(["all", "dl"]), "standard")
+    compare_players_chart(result["compare_stats"], result["season"], result["comp"], result["type"])
+
+WORKFLOWS = {
+    "passport": passport_workflow,
+    "analysis": analysis_workflow,
+    "comparison": comparison_workflow,
+}
+
+################################################################################################################################################
+# MEASURES
+################################################################################################################################################
+
+def current_rss_mb():
+    """Resident memory of the process in MB (Linux), or the peak RSS elsewhere."""
+    try:
+        with open("/proc/self/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource  # Not available on Windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+def run_level(concurrency, duration, mix, players, seed=0):
+    """
+    Runs `concurrency` simulated analysts for `duration` seconds, each one
+    chaining workflows drawn from the mix. Returns the measures of the level.
+    """
+    latencies = {name: [] for name in mix}
+    errors = {name: 0 for name in mix}
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+    peak_rss = [current_rss_mb()]
+    running = threading.Event()
+    running.set()
+
+    def sample_rss():
+        while running.is_set():
+            peak_rss[0] = max(peak_rss[0], current_rss_mb())
+            time.sleep(0.05)
+
+    def analyst(index):
+        rng = random.Random(seed * 1000 + index)
+        names, weights = list(mix), list(mix.values())
+        while time.monotonic() < stop_at:
+            name = rng.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                WORKFLOWS[name](rng, players)
+            except Exception:
+                with lock:
+                    errors[name] += 1
+                continue
+            with lock:
+                latencies[name].append(time.perf_counter() - start)
+
+    sampler = threading.Thread(target=sample_rss, daemon=True)
+    sampler.start()
+    started = time.monotonic()
+    threads = [threading.Thread(target=analyst, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - started
+    running.clear()
+    sampler.join()
+
+    completed = sum(len(v) for v in latencies.values())
+    return {
+        "concurrency": concurrency,
+        "throughput": completed / elapsed,
+        "peak_rss_mb": round(peak_rss[0], 1),
+        "workflows": {
+            name: {
+                "count": len(values),
+                "errors": errors[name],
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "p99": percentile(values, 99),
+            }
+            for name, values in latencies.items()
+        },
+    }
+
+def print_level(result):
+    print(f"\n👥 Concurrency {result['concurrency']} — {result['throughput']:.2f} workflows/s — peak RSS {result['peak_rss_mb']} MB")
+    for name, w in result["workflows"].items():
+        if w["count"]:
+            print(f"   {name:<11} n={w['count']:<5} errors={w['errors']:<3} "
+                  f"p50={w['p50']:.3f}s p95={w['p95']:.3f}s p99={w['p99']:.3f}s")
+        else:
+            print(f"   {name:<11} n=0     errors={w['errors']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test of the FBref scraper workflows against a local stand-in server")
+    parser.add_argument("--concurrency", type=str, default="1,2,4,8", help="Comma-separated numbers of simultaneous analysts")
+    parser.add_argument("--duration", type=float, default=20, help="Duration of each level in seconds")
+    parser.add_argument("--latency", type=float, default=0.1, help="Latency of the stand-in server in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random variation of the latency in seconds")
+    parser.add_argument("--page-kb", type=int, default=500, help="Size added to every page, in KB")
+    parser.add_argument("--players", type=int, default=200, help="Number of distinct players")
+    parser.add_argument("--mix", type=str, default="passport=3,analysis=4,comparison=3", help="Weights of the workflows")
+    parser.add_argument("--rate", type=float, default=0.0, help="Delay between requests (RATE_SEC) during the test")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the page cache")
+    parser.add_argument("--json", type=str, default=None, help="Write the results in this JSON file")
+    args = parser.parse_args()
+
+    mix = {name: float(weight) for name, weight in (item.split("=") for item in args.mix.split(","))}
+    unknown = [name for name in mix if name not in WORKFLOWS]
+    if unknown:
+        print(f"⚠️ Unknown workflows : {', '.join(unknown)} (available : {', '.join(WORKFLOWS)})")
+        sys.exit(1)
+
+    server = start_stand_in_server(args.latency, args.jitter, args.page_kb)
+    scraper.BASE = f"http://127.0.0.1:{server.server_address[1]}"
+    scraper.RATE_LIMITER = PriorityRateLimiter(args.rate)
+    scraper.PHOTO_RATE_SEC = args.rate
+    scraper.PAGE_ARCHIVE = None
+    if args.no_cache:
+        scraper.CACHE_TTL_SEC = 0
+    # The CSV files, passports, photos and table schemas written by the workflows go to a temporary folder
+    work_dir = tempfile.mkdtemp(prefix="fbref-loadtest-")
+    scraper.OUTPUT_DIR = work_dir
+    scraper.PHOTO_DIR = os.path.join(work_dir, "photos")
+    scraper.SCHEMA_REGISTRY = TableSchemaRegistry(os.path.join(work_dir, "table_schemas.json"))
+
+    print(f"✅ Stand-in server on {scraper.BASE} (latency {args.latency}s, pages +{args.page_kb} KB)")
+    results = []
+    try:
+        for level, concurrency in enumerate(int(c) for c in args.concurrency.split(",")):
+            with PAGE_CACHE_LOCK:
+                PAGE_CACHE.clear()
+            # The status prints of the workflows are silenced during the measure
+            with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+                result = run_level(concurrency, args.duration, mix, args.players, seed=level)
+            print_level(result)
+            results.append(result)
+    finally:
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Results recorded in : {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import sys
 import argparse 
 from scraper import *
+from coordination import use_shared_rate_limit_from_env
 
 def main():
     
@@ -8,7 +9,7 @@ def main():
     parser.add_argument("player_name", type=str, nargs="+", help="Name of the player whose information you want")
     parser.add_argument("--comp", type=str, default=None, choices=["all", "dl", "dc", "ic", "nt"], 
                         help="Competitions : all (all competitions), dl (domestic leagues), dc (domestic cups), ic (international cups), nt (national team)")
-    parser.add_argument("--season", type=str, default=None, help="Player season to be analyzed (e.g., '2014-2015'). Use 'all' for all seasons.")
+    parser.add_argument("--season", type=str, default=None, help="Player season to be analyzed (e.g., '2014-2015' or a range '2018-2019:2022-2023'). Use 'all' for all seasons.")
     parser.add_argument("--type", type=str, default=None, choices=["standard", "shooting", "passing", "pass_types", "da", "g&s", "goalkeeping"], help="Type of statistics to extract"
 )
     parser.add_argument(
@@ -16,14 +17,185 @@ def main():
         action="store_true",
         help="Save the extracted CSV (disabled by default)"
     )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Parse the page while it downloads and stop as soon as the needed block is read (the page is not archived)"
+    )
+    parser.add_argument(
+        "--passports",
+        action="store_true",
+        help="Generate the passport of every player given (any number of names, player page URLs or squad page URLs)"
+    )
+    parser.add_argument(
+        "--bundle",
+        action="store_true",
+        help="With --passports, write all passports in a single HTML page"
+    )
+    parser.add_argument(
+        "--report",
+        type=str,
+        default=None,
+        help="Write the comparison (bar and radar charts) in this HTML file instead of opening a window"
+    )
+    parser.add_argument(
+        "--scopes",
+        type=str,
+        default=None,
+        help="Comma-separated competitions fetched together in one view (e.g. 'all,dl,dc,ic,nt'). Requires --type."
+    )
+    parser.add_argument(
+        "--trend",
+        type=str,
+        default=None,
+        help="Comma-separated stats compared season by season (e.g. 'Gls,Ast,xG'). Requires --comp and --type; --season may give a range."
+    )
+    parser.add_argument(
+        "--stats",
+        type=str,
+        default=None,
+        help="Comma-separated stats to extract, as FBref labels or column names (e.g. 'Gls,Ast,expected_xg'). Every stat by default."
+    )
+    parser.add_argument(
+        "--format",
+        type=str,
+        default="text",
+        choices=["text", "ndjson"],
+        help="Output format : text (default) or ndjson (one JSON record per line on stdout, status messages on stderr)"
+    )
     args = parser.parse_args()
     
+    # NDJSON mode: the records are the only thing written on stdout
+    ndjson = args.format == "ndjson"
+    records_out = sys.stdout
+    if ndjson:
+        sys.stdout = sys.stderr
+    use_shared_rate_limit_from_env()
 
     names = args.player_name
     season_args = args.season
     comp_args = args.comp 
     types_args = args.type
+    stats_args = [s.strip() for s in args.stats.split(",") if s.strip()] if args.stats else None
+    # Only the requested stats are read from the tables
+    projection = StatProjection(stats=stats_args) if stats_args else None
     
+    # Batch of passports
+    if args.passports:
+        if season_args or comp_args or types_args or args.scopes:
+            print("⚠️ The --passports parameter cannot be combined with --season, --comp, --type or --scopes.")
+            sys.exit(1)
+        # Player and squad page URLs need no search: a batch then only fetches the player pages
+        players = []
+        for name in (n.strip() for n in names):
+            if "/en/squads/" in name:
+                try:
+                    players.extend(squad_player_urls(name))
+                except (ValueError, RuntimeError) as e:
+                    print(f"❌ Squad page {name} not read :", e)
+            else:
+                players.append(name)
+        passports, errors = generate_player_passports(players, bundle=args.bundle)
+        if ndjson:
+            for name, _, path in passports:
+                write_ndjson({"player": name, "passport": path}, records_out)
+            for name, message in errors:
+                write_ndjson({"player": name, "error": message}, records_out)
+        print(f"✅ {len(passports)} passports generated, {len(errors)} failed.")
+        sys.exit(0 if passports else 2)
+
+    # Season by season comparison: one page and one parse per player
+    if args.trend:
+        trend_stats = [s.strip() for s in args.trend.split(",") if s.strip()]
+        if not (comp_args and types_args) or args.scopes or (season_args and ":" not in season_args and season_args.lower() != "all"):
+            print("⚠️ The --trend parameter needs a --comp and a --type, and optionally a season range with --season.")
+            print("Example of a valid command: python3 main.py 'Lionel Messi' 'Cristiano Ronaldo' --trend 'Gls,Ast' --comp 'dl' --type 'standard' --season '2010-2011:2017-2018'")
+            sys.exit(1)
+
+        season_param = season_args if season_args and ":" in season_args else None
+        table_id = get_table_id_for_type(types_args, comp_args)
+        # 'Gls/90' is read from the Gls columns of the table
+        trend_projection = StatProjection(stats=[s.removesuffix("/90") for s in trend_stats])
+        trends = {}
+        for name in names:
+            name = name.strip()
+            print(f"⚙️ Extraction for {name}...")
+            try:
+                _, chosen = fbref_search(name)["players"][0]
+                comp_url, _ = get_competition_url(chosen, comp=comp_args)
+                if args.stream:
+                    _, html_comp = fetch_element(comp_url, table_id)
+                else:
+                    _, html_comp = fetch_page(comp_url)
+                trends[name] = extract_player_stats_by_competition(html_comp, table_id, season=season_param, projection=trend_projection)
+            except ValueError as ve:
+                print(f"❌ Data extraction declined for {name} :", ve)
+                continue
+            except Exception as e:
+                print(f"❌ Error during extraction for {name} :", e)
+                sys.exit(3)
+            if ndjson:
+                for record in iter_stat_records(trends[name], player=name, comp=comp_args, type=types_args):
+                    write_ndjson(record, records_out)
+
+        if not trends:
+            print("⚠️ No data available for this selection.")
+            sys.exit(5)
+        if ndjson and not args.report:
+            sys.exit(0)
+
+        print("\n📊 Generation of the trend graph...")
+        comparison = {"trends": trends, "stats": trend_stats, "comp": comp_args, "type": types_args, "chart": "trend"}
+        if args.report:
+            generate_comparison_report([comparison], output_path=args.report)
+            sys.exit(0)
+
+        fig = compare_players_trend_chart(trends, trend_stats, comp_args, types_args)
+        if fig is None:
+            sys.exit(0)
+        fig.show()
+        sys.exit(0)
+
+    # Cross-competition view
+    if args.scopes:
+        scopes = [s.strip().lower() for s in args.scopes.split(",") if s.strip()]
+        if not types_args or comp_args or len(names) != 1 or any(s not in ["all", "dl", "dc", "ic", "nt"] for s in scopes):
+            print("⚠️ The --scopes parameter needs one player, a --type and a list of competitions among all, dl, dc, ic, nt (without --comp).")
+            print("Example of a valid command: python3 main.py 'Lionel Messi' --scopes 'all,dl,ic' --type 'standard' --season '2014-2015:2016-2017'")
+            sys.exit(1)
+
+        name = names[0].strip()
+        print(f"🔍 Searching for : {name}")
+        try:
+            results = fbref_search(name)
+            _, chosen = results["players"][0]
+            scope_stats, reconciliation = extract_player_stats_all_scopes(chosen, types_args, scopes, season=season_args, projection=projection)
+        except ValueError as ve:
+            print("❌ Data extraction declined  :", ve)
+            sys.exit(5)
+        except Exception as e:
+            print("❌ Error during extraction :", e)
+            sys.exit(3)
+
+        if scope_stats.empty:
+            print("⚠️ No data available for this selection.")
+            sys.exit(0)
+
+        if ndjson:
+            for record in iter_scope_records(scope_stats, player=name, type=types_args):
+                write_ndjson(record, records_out)
+        else:
+            print(scope_stats.to_string())
+        if not reconciliation.empty and (reconciliation.fillna(0) != 0).any().any():
+            print("⚠️ Some competition totals differ from the 'All Competitions' table :")
+            print(reconciliation.to_string())
+
+        if args.save:
+            save_scope_stats_to_csv(scope_stats, player_name=name, season=season_args, type=types_args)
+        else:
+            print("⚠️ Add --save to the command if you want to save the data in a CSV file.")
+        sys.exit(0)
+
     # Check of argument consistency
     if (season_args and not (comp_args and types_args)) or (comp_args and not (season_args and types_args)) or (types_args and not (season_args and comp_args)):
         print("⚠️ If you use the --season parameter, you must specify a value for the --comp and the --type parameters , and vice versa.")
@@ -48,13 +220,18 @@ def main():
             # Passport
             if not season_args and not comp_args:
                 try:
-                    _, html = fetch_page(chosen)
+                    if args.stream:
+                        _, html = fetch_element(chosen, "meta")
+                    else:
+                        _, html = fetch_page(chosen)
                 except Exception as e:
                     print("❌ Error while downloading the page :", e)
                     sys.exit(3)
 
                 player_info = extract_player_info(html, chosen, name)
                 generate_player_passeport(player_info)
+                if ndjson:
+                    write_ndjson({k: v for k, v in player_info.items() if not k.startswith("_")}, records_out)
                 sys.exit(0)
 
             # Stats by competition and season
@@ -72,7 +249,10 @@ def main():
                 sys.exit(4)
 
             try:
-                _, html_comp = fetch_page(comp_url)
+                if args.stream:
+                    _, html_comp = fetch_element(comp_url, table_id)
+                else:
+                    _, html_comp = fetch_page(comp_url)
             except Exception as e:
                 print("❌ Error while downloading the competition page :", e)
                 sys.exit(3)
@@ -80,7 +260,10 @@ def main():
             # Extract statistics by season
             season_param = season_args
             try:
-                stats = extract_player_stats_by_competition(html_comp, table_id, season=season_param)
+                stats = extract_player_stats_by_competition(html_comp, table_id, season=season_param, projection=projection)
+                if ndjson:
+                    for record in iter_stat_records(stats, player=name, comp=comp_args, type=types_args):
+                        write_ndjson(record, records_out)
                 # Save only if --save is used
                 if args.save:
                     r = save_season_stats_to_csv(
@@ -90,15 +273,20 @@ def main():
                         comp=comp_args,
                         type=types_args
                     )
-                else:
+                elif not ndjson:
                     print("⚠️ Add --save to the command if you want to save the data in a CSV file.")
                 sys.exit(0)
             except ValueError as ve:
                 print("❌ Data extraction declined  :", ve)
                 sys.exit(5)
             
-    elif len(names) == 2:
+    elif len(names) == 2 or (ndjson and len(names) > 2):
+        # In NDJSON mode any number of players can be streamed; only two are compared
         player_stats_list = []
+        # A chart is only drawn for two players, and in NDJSON mode only with --report
+        draws_chart = len(names) == 2 and (not ndjson or bool(args.report))
+        # The stats dropped by the comparison charts are not read; a stream without chart keeps them all
+        compare_projection = StatProjection.for_comparison(types_args, stats_args) if draws_chart else projection
 
         for name in names:
             name = name.strip()
@@ -118,18 +306,35 @@ def main():
             _, chosen = results["players"][0]
             comp_url, _ = get_competition_url(chosen, comp=comp_args)
             table_id = get_table_id_for_type(types_args, comp_args)
-            _, html_comp = fetch_page(comp_url)
+            if args.stream:
+                _, html_comp = fetch_element(comp_url, table_id)
+            else:
+                _, html_comp = fetch_page(comp_url)
             season_param = season_args
-            stats = extract_player_stats_by_competition(html_comp, table_id, season=season_param)
+            stats = extract_player_stats_by_competition(html_comp, table_id, season=season_param, projection=compare_projection)
+            if ndjson:
+                for record in iter_stat_records(stats, player=name, comp=comp_args, type=types_args):
+                    write_ndjson(record, records_out)
 
             core_stats = extract_core_stats(stats, name)
             player_stats_list.append(core_stats)
 
+        if not draws_chart:
+            sys.exit(0)
+
         if len(player_stats_list) < 2:
             print("⚠️ Cannot compare: only one valid player found.")
             sys.exit(0)
 
         print("\n📊 Generation of the comparative graph...")
+        if args.report:
+            comparisons = [
+                {"stats_list": player_stats_list, "season": season_args, "comp": comp_args, "type": types_args, "chart": chart}
+                for chart in ("bar", "radar")
+            ]
+            generate_comparison_report(comparisons, output_path=args.report)
+            sys.exit(0)
+
         fig = compare_players_chart(player_stats_list, season_args, comp_args, types_args)   
         if fig is None:
             print("⚠️ Comparison could not be generated due to lack of common statistics.")
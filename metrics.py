@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+from scraper import *
+from percentiles import to_numeric_frame, season_records
+
+################################################################################################################################################
+# DERIVED METRICS
+################################################################################################################################################
+# A stats frame has one row per player-season (and optionally per competition), with the metric names of
+# extract_core_stats (e.g. "performance_gls"); see season_records. Every derived metric is computed for all the
+# rows at once, as an operation between columns.
+#   - per90      : stat / number of 90 minutes played
+#   - ratio      : stat / other stat
+#   - percent    : stat / other stat * 100
+#   - difference : stat - other stat
+# A metric is skipped when one of its stats is missing from the frame (e.g. shooting metrics on a standard table).
+
+derived_metrics = [
+    # name, kind, stats, label
+    ("derived_gls_90", "per90", ("performance_gls",), "Goals per 90"),
+    ("derived_ast_90", "per90", ("performance_ast",), "Assists per 90"),
+    ("derived_g+a_90", "per90", ("performance_g+a",), "Goals + Assists per 90"),
+    ("derived_g_pk_90", "per90", ("performance_g_pk",), "Non-penalty Goals per 90"),
+    ("derived_xg_90", "per90", ("expected_xg",), "Expected Goals per 90"),
+    ("derived_npxg_90", "per90", ("expected_npxg",), "Non-penalty Expected Goals per 90"),
+    ("derived_xag_90", "per90", ("expected_xag",), "Expected Assisted Goals per 90"),
+    ("derived_sh_90", "per90", ("standard_sh",), "Shots per 90"),
+    ("derived_sot_90", "per90", ("standard_sot",), "Shots on Target per 90"),
+    ("derived_cmp_90", "per90", ("total_cmp",), "Passes Completed per 90"),
+    ("derived_crs_90", "per90", ("pass_types_crs",), "Crosses per 90"),
+    ("derived_tkl_90", "per90", ("tackles_tkl",), "Tackles per 90"),
+    ("derived_int_90", "per90", ("_int",), "Interceptions per 90"),
+    ("derived_sca_90", "per90", ("sca_sca",), "Shot-Creating Actions per 90"),
+    ("derived_gca_90", "per90", ("gca_gca",), "Goal-Creating Actions per 90"),
+    ("derived_gls_sh", "ratio", ("standard_gls", "standard_sh"), "Goals per Shot"),
+    ("derived_gls_sot", "ratio", ("standard_gls", "standard_sot"), "Goals per Shot on Target"),
+    ("derived_sot%", "percent", ("standard_sot", "standard_sh"), "Shots on Target %"),
+    ("derived_pk%", "percent", ("performance_pk", "performance_pkatt"), "Penalty Conversion %"),
+    ("derived_cmp%", "percent", ("total_cmp", "total_att"), "Pass Completion %"),
+    ("derived_short_cmp%", "percent", ("short_cmp", "short_att"), "Short Pass Completion %"),
+    ("derived_medium_cmp%", "percent", ("medium_cmp", "medium_att"), "Medium Pass Completion %"),
+    ("derived_long_cmp%", "percent", ("long_cmp", "long_att"), "Long Pass Completion %"),
+    ("derived_tklw%", "percent", ("tackles_tklw", "tackles_tkl"), "Tackles Won %"),
+    ("derived_save%", "percent", ("performance_saves", "performance_sota"), "Save %"),
+    ("derived_gls_xg", "difference", ("performance_gls", "expected_xg"), "Goals - Expected Goals"),
+    ("derived_npg_npxg", "difference", ("performance_g_pk", "expected_npxg"), "Non-penalty Goals - npxG"),
+]
+
+# Labels of the derived metrics, same use as stat_meaning
+derived_meaning = {name: label for name, _, _, label in derived_metrics}
+
+# Playing time columns, by order of preference, used as denominator of the per90 metrics
+minutes_columns = ["playing_time_min"]
+nineties_columns = ["playing_time_90s", "standard_90s", "total_90s", "_90s", "tackles_90s", "sca_90s"]
+
+def _nineties(frame):
+    """Returns the number of 90 minutes played by row, or None when the frame has no playing time."""
+    for column in minutes_columns:
+        if column in frame.columns:
+            return frame[column].to_numpy(dtype=float) / 90
+    for column in nineties_columns:
+        if column in frame.columns:
+            return frame[column].to_numpy(dtype=float)
+    return None
+
+def _evaluate(kind, values, nineties):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if kind == "per90":
+            result = values[0] / nineties
+        elif kind == "ratio":
+            result = values[0] / values[1]
+        elif kind == "percent":
+            result = values[0] / values[1] * 100
+        elif kind == "difference":
+            result = values[0] - values[1]
+        else:
+            raise ValueError(f"⚠️ Unknown metric kind : {kind}")
+    # Division by zero (no shot, no minute...) gives no value
+    return np.where(np.isfinite(result), result, np.nan)
+
+def add_derived_metrics(frame, metrics=None, decimals=2):
+    """
+    Returns a copy of the stats frame with the derived metrics added as columns.
+    metrics: list of (name, kind, stats, label) tuples, derived_metrics by default.
+    """
+    metrics = derived_metrics if metrics is None else metrics
+    used = sorted({stat for _, _, stats, _ in metrics for stat in stats} | set(minutes_columns) | set(nineties_columns))
+    numeric = to_numeric_frame(frame[[c for c in used if c in frame.columns]])
+    nineties = _nineties(numeric)
+
+    derived = {}
+    for name, kind, stats, _ in metrics:
+        if any(stat not in numeric.columns for stat in stats) or (kind == "per90" and nineties is None):
+            continue
+        values = [numeric[stat].to_numpy(dtype=float) for stat in stats]
+        derived[name] = _evaluate(kind, values, nineties).round(decimals)
+
+    return pd.concat([frame, pd.DataFrame(derived, index=frame.index)], axis=1)
+
+################################################################################################################################################
+# AGGREGATION
+################################################################################################################################################
+# Rates cannot be added: when seasons or competitions are merged, the counting stats are summed and the
+# derived metrics are computed again from the sums.
+
+# Stats that already are rates or averages
+rate_suffixes = ("%", "90", "_age", "_dist", "_lgrank", "_g_sh", "_g_sot", "_npxg_sh", "_g_xg", "_np:g_xg")
+
+def _is_counting_stat(column):
+    """Counting stats can be summed; percentages, per 90 values and averages cannot."""
+    return not column.startswith("derived_") and "per_90" not in column and not column.endswith(rate_suffixes)
+
+def counting_columns(frame):
+    """Lists the numeric counting stats of a stats frame."""
+    numeric = to_numeric_frame(frame.drop(columns=[c for c in ("Player", "league", "season", "position") if c in frame.columns]))
+    return [c for c in numeric.columns if _is_counting_stat(c) and numeric[c].notna().any()]
+
+def aggregate_stats(frame, by=("Player",), metrics=None):
+    """
+    Sums the counting stats of the rows sharing the same keys (e.g. the competitions
+    of a season, or every season of a player) and computes the derived metrics on the totals.
+    """
+    columns = counting_columns(frame)
+    totals = to_numeric_frame(frame[columns]).groupby([frame[key] for key in by]).sum(min_count=1)
+    return add_derived_metrics(totals.reset_index(), metrics)
+
+def rolling_metrics(frame, window=3, by="Player", order="season", metrics=None):
+    """
+    Sums the counting stats of each player over the last `window` seasons (the
+    current one included) and computes the derived metrics on these sums.
+    The rows of a season (e.g. one per competition) are summed first, so the
+    window counts seasons, not rows. One row per player-season.
+    """
+    columns = counting_columns(frame)
+    seasons = to_numeric_frame(frame[columns]).groupby([frame[by], frame[order]]).sum(min_count=1).sort_index()
+    rolled = (
+        seasons.groupby(level=0)
+        .rolling(window, min_periods=1)
+        .sum()
+        .reset_index(level=0, drop=True)
+    )
+    return add_derived_metrics(rolled.reset_index(), metrics)
+
+def stats_frame(stats, player_name, position=None):
+    """Builds a stats frame from the output of extract_player_stats_by_competition."""
+    return pd.DataFrame(season_records(stats, player_name, position))
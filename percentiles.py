@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from scraper import *
+
+################################################################################################################################################
+# REFERENCE POPULATION
+################################################################################################################################################
+# A population is a DataFrame with one row per player-season: "Player", "league", "season", optionally
+# "position", and one column per metric named like extract_core_stats (e.g. "performance_gls").
+
+def to_numeric_frame(frame):
+    """Converts FBref values ('1,234', 'N/A'...) to floats."""
+    return frame.replace({r",": ""}, regex=True).apply(pd.to_numeric, errors="coerce")
+
+def season_records(stats, player_name, position=None):
+    """
+    Splits the output of extract_player_stats_by_competition into one record per
+    season, with the metric names of extract_core_stats. The league is read
+    from the 'Comp' column of the table.
+    """
+    records = []
+    for season, categories in stats.items():
+        core_stats = extract_core_stats({season: categories}, player_name)
+        league = next((v for k, v in core_stats.items() if k.endswith("_comp")), None)
+        records.append({**core_stats, "league": league, "season": season, "position": position})
+    return records
+
+def population_from_archive(stat_type="standard", comp="dl", archive=None):
+    """
+    Builds a population from the archived competition pages (see archive.py),
+    without any request. The position comes from the archived player page when present.
+    """
+    archive = archive or PAGE_ARCHIVE
+    records = []
+    for url, _, digest in archive.entries("%/en/players/%"):
+        parsed = parse_competition_url(url)
+        if parsed is None or parsed[2] != comp:
+            continue
+        player_id, player_name, _ = parsed
+
+        try:
+            stats = extract_player_stats_by_competition(archive.load(digest), get_table_id_for_type(stat_type, comp), season=None)
+        except ValueError:
+            continue
+
+        position = None
+        player_url = url.split("/en/players/")[0] + f"/en/players/{player_id}/{player_name}"
+        player_html = archive.latest(player_url)
+        if player_html:
+            position = extract_player_info(player_html, player_url, player_name).get("position")
+
+        records.extend(season_records(stats, player_name.replace("-", " "), position))
+    return pd.DataFrame(records)
+
+################################################################################################################################################
+# PERCENTILE ENGINE
+################################################################################################################################################
+
+class PercentileEngine:
+    """
+    Percentiles of players against a reference population of the same league
+    and season (and optionally the same position).
+    For every group and every stat the population values are sorted once, so a
+    lookup is a vectorized binary search (numpy.searchsorted).
+    """
+    def __init__(self, population, stats=None):
+        population = population.copy()
+        self.stats = [s for s in (stats or stat_meaning) if s in population.columns]
+        population[self.stats] = to_numeric_frame(population[self.stats])
+
+        self._sorted = {}
+        if "position" not in population.columns:
+            population["position"] = None
+        for (league, season), group in population.groupby(["league", "season"]):
+            self._add_group((league, season, None), group)
+            for position, position_group in group.groupby(group["position"].map(_main_position)):
+                self._add_group((league, season, position), position_group)
+
+    def _add_group(self, key, group):
+        self._sorted[key] = {
+            stat: np.sort(values[~np.isnan(values)])
+            for stat in self.stats
+            if (values := group[stat].to_numpy(dtype=float)).size
+        }
+
+    def groups(self):
+        """Lists the (league, season, position) groups available."""
+        return list(self._sorted)
+
+    def percentiles(self, players, league, season, position=None):
+        """
+        Returns a DataFrame (one row per player, one column per stat) with the
+        percentile (0-100) of each value in the reference group.
+        players: list of dicts as returned by extract_core_stats, or a DataFrame indexed by player.
+        """
+        key = (league, season, _main_position(position) if position else None)
+        if key not in self._sorted:
+            raise ValueError(f"⚠️ No reference population for {league} {season} {position or ''}".strip())
+
+        frame = players if isinstance(players, pd.DataFrame) else pd.DataFrame(players).set_index("Player")
+        stats = [s for s in self.stats if s in frame.columns and self._sorted[key].get(s) is not None and self._sorted[key][s].size]
+        values = to_numeric_frame(frame[stats])
+
+        result = {}
+        for stat in stats:
+            reference = self._sorted[key][stat]
+            column = values[stat].to_numpy(dtype=float)
+            ranks = np.searchsorted(reference, column, side="right") / reference.size * 100
+            result[stat] = np.where(np.isnan(column), np.nan, ranks.round(1))
+        return pd.DataFrame(result, index=frame.index)
+
+def _main_position(position):
+    """Keeps the main position code of a FBref position ('FW-MF (AM-WM, right)' -> 'FW')."""
+    if not isinstance(position, str) or not position.strip() or position == "Unknown":
+        return None
+    return position.strip()[:2].upper()
+
+def compare_players_percentile_radar_chart(stats_list, engine, league, season, position=None, comp=None, type="standard"):
+    """
+    Compare players with a radar chart of their percentiles in the reference population.
+    """
+    percentiles = engine.percentiles(stats_list, league, season, position)
+    current_exclusions = excluded_stats.get(type, [])
+    percentiles = percentiles.drop(columns=[c for c in current_exclusions if c in percentiles.columns])
+    percentiles = percentiles.dropna(axis=1, how="any")
+    if percentiles.empty:
+        print("⚠️ No common statistics between players.")
+        return None
+
+    display_labels = [stat_meaning.get(stat, stat) for stat in percentiles.columns]
+
+    fig = go.Figure()
+    for player, row in percentiles.iterrows():
+        fig.add_trace(go.Scatterpolar(
+            r=row.values,
+            theta=display_labels,
+            fill="toself",
+            name=player,
+            hovertemplate="<br>%{theta}: %{r}th percentile<extra></extra>"
+        ))
+
+    comp_label = comp_map_full.get(str(comp).lower(), comp) if comp else league
+    position_label = f" - {position}" if position else ""
+    fig.update_layout(
+        title=dict(
+            text=f"{type_map_full.get(type, type)} Percentiles – {season} - {comp_label}{position_label}",
+            x=0.5,
+            xanchor="center",
+            font=dict(size=18)
+        ),
+        polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
+        template="plotly_white",
+        height=800
+    )
+    return fig
@@ -0,0 +1,291 @@
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import threading
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from archive import PageArchive
+from scraper import *
+
+################################################################################################################################################
+# REFERENCE DATASET
+################################################################################################################################################
+# Read-only table of the extracted stats, one row per (player id, season, comp, type), shared by every process.
+# Each version is a folder of .npy files opened with np.load(mmap_mode="r"): the arrays are never deserialised,
+# the pages are read from the OS page cache and shared by all the processes that open the same version.
+#   keys.npy          sorted keys "player_id|season|comp|type" (fixed-width bytes, binary search)
+#   player_id.npy, season.npy, comp.npy, type.npy, player.npy   key parts and player names, same order
+#   stat_<i>.npy      one float64 column per stat (NaN when missing), names in columns.json
+# CURRENT holds the name of the active version; it is replaced atomically (os.replace) once a new version is
+# complete, so a reader always sees a whole version.
+# The stats of the season in progress change every week: they are always scraped, and a version older than
+# REFERENCE_MAX_AGE_SEC is not used in place of a scrape.
+
+REFERENCE_DIR = "output/reference"
+REFERENCE_CHECK_SEC = 5  # Interval between two checks of CURRENT by an open dataset
+REFERENCE_KEEP_VERSIONS = 2  # Versions kept on disk (the older ones may still be mapped by a reader)
+REFERENCE_MAX_AGE_SEC = 7 * 24 * 3600  # Age beyond which a version is no longer used by reference_core_stats
+
+def reference_key(player_id, season, comp, stat_type):
+    return f"{player_id}|{season}|{comp}|{stat_type}".encode("utf-8")
+
+def _bytes_array(values):
+    """Fixed-width bytes array, the only string type numpy maps without a copy."""
+    encoded = [v if isinstance(v, bytes) else str(v).encode("utf-8") for v in values]
+    return np.array(encoded, dtype=f"S{max(1, max((len(v) for v in encoded), default=1))}")
+
+def is_current_season(season, today=None):
+    """
+    True for the season in progress ("2025-2026", or "2025" for the leagues played
+    over a calendar year, from July 2025), for the career total ("all") whose
+    stats still change, and for a season that cannot be read.
+    """
+    today = today or datetime.now()
+    if str(season).lower() == "all" or not re.match(r"^\d{4}(-\d{4})?$", str(season)):
+        return True
+    first_year = int(str(season)[:4])
+    if "-" in str(season):
+        return first_year >= (today.year if today.month >= 7 else today.year - 1)
+    return first_year >= today.year
+
+def _current_version(root):
+    try:
+        with open(os.path.join(root, "CURRENT"), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def write_reference(records, root=REFERENCE_DIR, keep=REFERENCE_KEEP_VERSIONS):
+    """
+    Writes a new version of the reference dataset and makes it current.
+    records: DataFrame with player_id, Player, season, comp and type columns, and one column per stat
+    (extract_core_stats names); non numeric stats are dropped.
+    Returns the name of the new version.
+    """
+    key_columns = ["player_id", "Player", "season", "comp", "type"]
+    records = records.drop_duplicates(subset=["player_id", "season", "comp", "type"], keep="last")
+    keys = [reference_key(*row) for row in records[["player_id", "season", "comp", "type"]].itertuples(index=False)]
+    order = np.argsort(np.array(keys, dtype=object))
+    records = records.iloc[order]
+
+    stats = records.drop(columns=key_columns).apply(pd.to_numeric, errors="coerce")
+    stats = stats.loc[:, stats.notna().any()]
+
+    version = f"v{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}"
+    tmp_dir = os.path.join(root, f".{version}.tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    np.save(os.path.join(tmp_dir, "keys.npy"), _bytes_array(np.array(keys, dtype=object)[order]))
+    for column in key_columns:
+        np.save(os.path.join(tmp_dir, f"{column.lower()}.npy"), _bytes_array(records[column]))
+    for i, column in enumerate(stats.columns):
+        np.save(os.path.join(tmp_dir, f"stat_{i}.npy"), stats[column].to_numpy(dtype=np.float64))
+    with open(os.path.join(tmp_dir, "columns.json"), "w", encoding="utf-8") as f:
+        json.dump({"stats": list(stats.columns), "rows": len(records), "built_at": time.time()}, f)
+
+    # Publish: the folder first, then the pointer
+    os.replace(tmp_dir, os.path.join(root, version))
+    pointer_tmp = os.path.join(root, f"CURRENT.{os.getpid()}.tmp")
+    with open(pointer_tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(pointer_tmp, os.path.join(root, "CURRENT"))
+
+    # Old versions
+    versions = sorted(d for d in os.listdir(root) if d.startswith("v") and os.path.isdir(os.path.join(root, d)))
+    for old in versions[:-keep] if keep else []:
+        shutil.rmtree(os.path.join(root, old), ignore_errors=True)
+
+    print(f"✅ Reference dataset {version} : {len(records)} rows, {len(stats.columns)} stats.")
+    return version
+
+class ReferenceVersion:
+    """Mapped arrays of one version of the reference dataset."""
+    def __init__(self, root, version):
+        path = os.path.join(root, version)
+        columns_path = os.path.join(path, "columns.json")
+        with open(columns_path, encoding="utf-8") as f:
+            columns = json.load(f)
+        self.stats = columns["stats"]
+        # Versions written before built_at was recorded: time of the file
+        self.built_at = columns.get("built_at") or os.path.getmtime(columns_path)
+        load = lambda name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+        self.name = version
+        self.keys = load("keys")
+        self.player_ids, self.players = load("player_id"), load("player")
+        self.seasons, self.comps, self.types = load("season"), load("comp"), load("type")
+        self.columns = {stat: load(f"stat_{i}") for i, stat in enumerate(self.stats)}
+
+class ReferenceDataset:
+    """
+    Memory-mapped view of the current version of the reference dataset.
+    A newer version published by write_reference is picked up by the next
+    lookup (at most every REFERENCE_CHECK_SEC seconds). Each lookup works on
+    a single version, even when the swap happens meanwhile.
+    """
+    def __init__(self, root=REFERENCE_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self._checked_at = time.monotonic()
+        version = _current_version(root)
+        if version is None:
+            raise ValueError(f"⚠️ No reference dataset in {root}.")
+        self._version = ReferenceVersion(root, version)
+
+    @property
+    def version(self):
+        return self._version.name
+
+    @property
+    def stats(self):
+        return self._version.stats
+
+    @property
+    def age(self):
+        """Seconds since the current version was built."""
+        return time.time() - self.current().built_at
+
+    def current(self):
+        """Returns the current version, switching to a newer one if it was published."""
+        now = time.monotonic()
+        if now - self._checked_at >= REFERENCE_CHECK_SEC:
+            with self._lock:
+                self._checked_at = now
+                version = _current_version(self.root)
+                if version and version != self._version.name:
+                    self._version = ReferenceVersion(self.root, version)
+        return self._version
+
+    def __len__(self):
+        return len(self._version.keys)
+
+    def lookup(self, player_id, season, comp, stat_type):
+        """Returns {stat: value} for one row (missing stats left out), or None."""
+        data = self.current()
+        key = reference_key(player_id, season, comp, stat_type)
+        # Binary search on the mapped keys
+        i = int(np.searchsorted(data.keys, key))
+        if i >= len(data.keys) or data.keys[i] != key:
+            return None
+        values = {stat: float(column[i]) for stat, column in data.columns.items()}
+        return {stat: value for stat, value in values.items() if not np.isnan(value)}
+
+    def column(self, stat):
+        """Mapped array of a stat for every row (no copy)."""
+        return self.current().columns[stat]
+
+    def frame(self, season=None, comp=None, stat_type=None, stats=None):
+        """
+        DataFrame of the rows matching the filters, with the columns of a percentile
+        population: Player, season, league (= comp) and the stats. The filters are
+        computed on the mapped key parts and only the selected rows are copied.
+        """
+        data = self.current()
+        mask = np.ones(len(data.keys), dtype=bool)
+        for values, wanted in ((data.seasons, season), (data.comps, comp), (data.types, stat_type)):
+            if wanted is not None:
+                mask &= values == str(wanted).encode("utf-8")
+        rows = np.flatnonzero(mask)
+
+        frame = {
+            "Player": np.char.decode(data.players[rows], "utf-8"),
+            "season": np.char.decode(data.seasons[rows], "utf-8"),
+            "league": np.char.decode(data.comps[rows], "utf-8"),
+        }
+        frame.update({stat: data.columns[stat][rows] for stat in (stats or data.stats) if stat in data.columns})
+        return pd.DataFrame(frame)
+
+_REFERENCE = None
+_REFERENCE_LOCK = threading.Lock()
+
+def get_reference(root=REFERENCE_DIR):
+    """Returns the dataset of the process (opened once), or None if no version was built yet."""
+    global _REFERENCE
+    with _REFERENCE_LOCK:
+        if _REFERENCE is None or _REFERENCE.root != root:
+            try:
+                _REFERENCE = ReferenceDataset(root)
+            except (ValueError, OSError):
+                return None
+        return _REFERENCE
+
+def reference_core_stats(player_url, player_name, season, comp, stat_type, max_age=None):
+    """
+    Stats of a player in the format of extract_core_stats, read from the reference
+    dataset, as (core stats, name of the version read). Returns None when the row
+    is not in the dataset, when the season is still in progress or when the
+    dataset is older than max_age (REFERENCE_MAX_AGE_SEC by default): the caller
+    then scrapes it.
+    """
+    reference = get_reference()
+    parts = urlparse(player_url).path.strip("/").split("/")
+    if reference is None or len(parts) < 3 or not season or is_current_season(season):
+        return None
+    data = reference.current()
+    if time.time() - data.built_at > (REFERENCE_MAX_AGE_SEC if max_age is None else max_age):
+        return None
+    values = reference.lookup(parts[2], season, comp, stat_type)
+    if values is None:
+        return None
+    return {"Player": player_name, **values}, data.name
+
+################################################################################################################################################
+# BUILD
+################################################################################################################################################
+
+def records_from_archive(types=("standard",), comps=None, archive=None):
+    """Extracts every season of the archived competition pages into reference records (no request)."""
+    archive = archive or PAGE_ARCHIVE
+    records = []
+    for url, _, digest in archive.entries("%/en/players/%"):
+        parsed = parse_competition_url(url)
+        if parsed is None or (comps and parsed[2] not in comps):
+            continue
+        player_id, player_name, comp = parsed
+        html = archive.load(digest)
+        for stat_type in types:
+            try:
+                stats = extract_player_stats_by_competition(html, get_table_id_for_type(stat_type, comp), season=None)
+            except ValueError:
+                continue
+            for season, categories in stats.items():
+                record = {"player_id": player_id, "Player": player_name.replace("-", " "), "season": season,
+                          "comp": comp, "type": stat_type}
+                for category, substats in categories.items():
+                    for stat, value in substats.items():
+                        record[core_stat_name(category, stat)] = parse_stat_value(value)
+                records.append(record)
+    return pd.DataFrame(records)
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or inspect the shared reference dataset")
+    parser.add_argument("command", choices=["build", "info"], help="build: new version from the archive, info: current version")
+    parser.add_argument("--root", type=str, default=REFERENCE_DIR, help="Reference dataset folder")
+    parser.add_argument("--archive", type=str, default=ARCHIVE_DIR, help="Archive folder (build)")
+    parser.add_argument("--type", type=str, default="standard", help="Comma-separated types of statistics (build)")
+    parser.add_argument("--comp", type=str, default=None, help="Comma-separated competitions (build, every competition by default)")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        types = [t.strip() for t in args.type.split(",") if t.strip()]
+        comps = [c.strip() for c in args.comp.split(",") if c.strip()] if args.comp else None
+        records = records_from_archive(types, comps, PageArchive(args.archive))
+        if records.empty:
+            print("⚠️ No archived competition page to build the reference dataset.")
+            sys.exit(1)
+        write_reference(records, args.root)
+        sys.exit(0)
+
+    reference = get_reference(args.root)
+    if reference is None:
+        print(f"⚠️ No reference dataset in {args.root}.")
+        sys.exit(1)
+    print(f"📦 Version {reference.version} : {len(reference)} rows, {len(reference.stats)} stats, built {reference.age / 3600:.1f} h ago.")
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import sys
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from archive import PageArchive
+from scraper import *
+
+################################################################################################################################################
+# REPARSE
+################################################################################################################################################
+# Runs the current extractors over the archived competition pages and rewrites the CSV outputs,
+# without downloading anything: a historical backfill is bounded by the CPU, not by RATE_SEC.
+
+def archived_player_name(archive, comp_url, player_id, slug):
+    """
+    Name of the player as shown on the archived player page (the name the CLI
+    files are saved under), or the URL slug with spaces when the page is not archived.
+    """
+    parts = urlparse(comp_url)
+    player_url = f"{parts.scheme}://{parts.netloc}/en/players/{player_id}/{slug}"
+    html = archive.latest(player_url)
+    if html:
+        name = extract_player_info(html, player_url, "").get("name")
+        if name and name != "Name not found":
+            return name
+    return slug.replace("-", " ")
+
+def reparse_page(archive_root, url, digest, types, season, stats=None):
+    """
+    Extracts the requested stat types from one archived competition page and saves them.
+    season: as in extract_player_stats_by_competition ("all" for the career total, None for every season).
+    stats: optional list of the stats to keep (see StatProjection).
+    Returns the list of written CSV files.
+    """
+    parsed = parse_competition_url(url)
+    if parsed is None:
+        return []
+    player_id, slug, comp = parsed
+
+    archive = PageArchive(archive_root)
+    player_name = archived_player_name(archive, url, player_id, slug)
+    html = archive.load(digest)
+    projection = StatProjection(stats=stats) if stats else None
+    written = []
+    for stat_type in types:
+        table_id = get_table_id_for_type(stat_type, comp)
+        try:
+            season_stats = extract_player_stats_by_competition(html, table_id, season=season, projection=projection)
+        except ValueError:
+            # Table or season not present on this page
+            continue
+        csv_path = save_season_stats_to_csv(season_stats, player_name=player_name, season=season, comp=comp, type=stat_type)
+        if csv_path:
+            written.append(csv_path)
+    return written
+
+def reparse_archive(archive_root=ARCHIVE_DIR, types=("standard",), season=None, comp=None, workers=None, stats=None):
+    """
+    Re-extracts the last archived version of every competition page in parallel processes.
+    comp restricts the pages to one competition (all, dl, dc, ic, nt), stats the extracted stats.
+    Returns the number of written CSV files.
+    """
+    entries = [
+        (url, digest) for url, _, digest in PageArchive(archive_root).entries("%/en/players/%")
+        if (parsed := parse_competition_url(url)) and (comp is None or parsed[2] == comp)
+    ]
+    if not entries:
+        print("⚠️ No archived competition page to reparse.")
+        return 0
+
+    print(f"⚙️ Reparsing {len(entries)} archived pages...")
+    written = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(reparse_page, archive_root, url, digest, list(types), season, stats) for url, digest in entries]
+        for future in futures:
+            try:
+                written += len(future.result())
+            except Exception as e:
+                print(f"❌ Reparse error : {e}")
+
+    print(f"✅ {written} CSV files rewritten from the archive.")
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-run the extractors over the archived FBref pages")
+    parser.add_argument("--archive", type=str, default=ARCHIVE_DIR, help="Archive folder")
+    parser.add_argument("--type", type=str, default="standard",
+                        help="Comma-separated types of statistics (standard, shooting, passing, pass_types, da, g&s, goalkeeping)")
+    parser.add_argument("--comp", type=str, default=None, choices=["all", "dl", "dc", "ic", "nt"], help="Only reparse this competition")
+    parser.add_argument("--season", type=str, default=None, help="Season, season range or 'all' (every season by default)")
+    parser.add_argument("--stats", type=str, default=None, help="Comma-separated stats to keep, e.g. 'Gls,Ast,xG' (every stat by default)")
+    parser.add_argument("--workers", type=int, default=None, help="Number of processes (CPU count by default)")
+    args = parser.parse_args()
+
+    types = [t.strip() for t in args.type.split(",") if t.strip()]
+    stats = [s.strip() for s in args.stats.split(",") if s.strip()] if args.stats else None
+    reparse_archive(args.archive, types, args.season, args.comp, args.workers, stats)
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
@@ -5,13 +5,29 @@ import unicodedata
 import sys
 import os 
 import csv
+import json
+import base64
+import hashlib
+import threading
 import pandas as pd
 import plotly.graph_objects as go
+from plotly.colors import qualitative
+from plotly.subplots import make_subplots
+from plotly.offline import get_plotlyjs
 from urllib.parse import urlparse
 from difflib import SequenceMatcher
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from lxml import etree
 from urllib.parse import quote_plus, urljoin
-from jinja2 import Template
+from jinja2 import Environment, FileSystemLoader
+from functools import lru_cache
+from datetime import datetime
+from html import escape
+from io import BytesIO
+from PIL import Image, ImageOps
+from concurrent.futures import ThreadPoolExecutor
+from archive import PageArchive
+from collections import Counter, OrderedDict, deque
 
 
 ################################################################################################################################################
@@ -35,9 +51,148 @@ BASE = "https://fbref.com"
 
 RATE_SEC = 1.5  # Delay between requests
 
+class RateLimiter:
+    """
+    Spaces out requests by at least `interval` seconds, shared by all threads
+    of the process. Each call to acquire() reserves the next free slot.
+    """
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def acquire(self, priority=None, give_way=None):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+        return True
+
+# Request priorities, from the most to the least urgent
+PRIORITY_INTERACTIVE = "interactive"  # Streamlit app, single-player CLI runs, API calls
+PRIORITY_BULK = "bulk"  # Crawls and batch jobs
+PRIORITY_PREFETCH = "prefetch"  # Speculative downloads, only when nothing else waits
+
+class PriorityRateLimiter:
+    """
+    Rate budget shared by several priority queues.
+    Each free slot goes to the oldest request of the most urgent non-empty
+    queue, except that a queue with a minimum share (e.g. {"bulk": 0.2}) gets
+    the slot once it has been skipped 1/share - 1 times in a row, so bulk
+    traffic keeps moving during interactive bursts.
+    The slot is only assigned when it is actually free, so an interactive
+    request waits at most for the request in progress.
+    The spacing itself is delegated to `inner` (a RateLimiter by default), which
+    receives the priority. An inner limiter that has to wait for a slot (e.g. the
+    shared budget of coordination.py) may return False when give_way() reports
+    a more urgent local request: the request then queues again behind it.
+    """
+    def __init__(self, interval, priorities=(PRIORITY_INTERACTIVE, PRIORITY_BULK, PRIORITY_PREFETCH), min_shares=None, inner=None):
+        self.interval = interval
+        self.priorities = list(priorities)
+        self.min_shares = {PRIORITY_BULK: 0.2} if min_shares is None else dict(min_shares)
+        self.inner = inner or RateLimiter(interval)
+        self._queues = {p: deque() for p in self.priorities}
+        self._skipped = {p: 0 for p in self.priorities}
+        self._busy = False
+        self._cond = threading.Condition()
+
+    def _next_priority(self):
+        waiting = [p for p in self.priorities if self._queues[p]]
+        if not waiting:
+            return None
+        for p in waiting:
+            share = self.min_shares.get(p)
+            if share and self._skipped[p] >= round(1 / share) - 1:
+                return p
+        return waiting[0]
+
+    def pending(self, priority=PRIORITY_INTERACTIVE):
+        """Number of requests waiting in the queue of this priority."""
+        with self._cond:
+            return len(self._queues[priority])
+
+    def acquire(self, priority=PRIORITY_INTERACTIVE):
+        if priority not in self._queues:
+            priority = self.priorities[-1]
+        ticket = object()
+
+        with self._cond:
+            self._queues[priority].append(ticket)
+        while True:
+            with self._cond:
+                while self._busy or self._queues[priority][0] is not ticket or self._next_priority() != priority:
+                    self._cond.wait()
+                self._busy = True
+
+            try:
+                granted = self.inner.acquire(priority, give_way=lambda: self._outranked(priority)) is not False
+            except BaseException:
+                with self._cond:
+                    self._queues[priority].remove(ticket)
+                    self._busy = False
+                    self._cond.notify_all()
+                raise
+
+            with self._cond:
+                if granted:
+                    self._queues[priority].popleft()
+                    for p in self.priorities:
+                        self._skipped[p] = 0 if p == priority or not self._queues[p] else self._skipped[p] + 1
+                self._busy = False
+                self._cond.notify_all()
+            if granted:
+                return
+
+    def _outranked(self, priority):
+        """True when the next free slot should go to another queue than this one."""
+        with self._cond:
+            return self._next_priority() != priority
+
+# Rate budget shared by every fetch of the process
+RATE_LIMITER = PriorityRateLimiter(RATE_SEC)
+
+# In-memory page cache (url -> (fetch time, html)), shared by the threads of the process
+CACHE_TTL_SEC = 900  # Lifetime of a cached page
+CACHE_MAX_PAGES = 256  # Least recently used pages are dropped beyond this size
+PAGE_CACHE = OrderedDict()
+PAGE_CACHE_LOCK = threading.Lock()
+# Downloads in progress (url -> Event set when the download ends), so that a second request waits for the first
+PAGES_IN_FLIGHT = {}
+
+# Folder of the CSV files (datas_player) and passports (passport_player)
+OUTPUT_DIR = "output"
+
+# Speculative prefetch of the pages likely to be requested after a search
+PREFETCH_TOP_SCOPES = 2  # Number of most used competitions to prefetch
+SCOPE_USAGE = Counter()  # comp -> number of requests, filled by get_competition_url
+
+# Compressed archive of every downloaded page (None to disable), used by reparse.py
+ARCHIVE_DIR = "output/archive"
+PAGE_ARCHIVE = PageArchive(ARCHIVE_DIR)
+
+# Local cache of the player photos shown on the passports
+PHOTO_DIR = "output/photos"
+PHOTO_SIZE = (180, 180)  # Display size of .player-photo in the passport template
+PHOTO_RATE_SEC = 1.0  # Delay between two photo downloads from the same host
+
+# Known header layouts of the stats tables (None to keep them in memory only)
+SCHEMA_FILE = "output/table_schemas.json"
+
 # Reusable sessions 
 CLOUDSCRAPER_SESSION = cloudscraper.create_scraper()
 CLOUDSCRAPER_SESSION.headers.update(DEFAULT_HEADERS)
+SESSION_LOCK = threading.Lock()
+
+# Pages answered with a 200 that are not the requested page (challenge, empty, cut off)
+CHALLENGE_MARKERS = (
+    "<title>just a moment", "cf-browser-verification", "cf_chl_opt",
+    "attention required! | cloudflare", "<title>rate limited request"
+)
+MIN_PAGE_CHARS = 100  # Below this size a page is considered empty
+PAGE_REJECTS = Counter()  # reason -> number of rejected pages
 
 ################################################################################################################################################
 # DATA DICTIONARIES
@@ -170,6 +325,15 @@ stat_meaning = {
     "penalty_kicks_save%": "Penalty Kicks Save %"
     }
 
+# Competition pages of a player: folder, suffix of the page name and standard table ID
+competition_pages = {
+    "all": ("all_comps", "-Stats---All-Competitions", "stats_standard_collapsed"),
+    "dl":  ("dom_lg",  "-Domestic-League-Stats",       "stats_standard_dom_lg"),
+    "dc":  ("dom_cup", "-Domestic-Cup-Stats",          "stats_standard_dom_cup"),
+    "ic":  ("intl_cup", "-International-Cup-Stats",    "stats_standard_intl_cup"),
+    "nt":  ("nat_tm",  "-National-Team-Stats",         "stats_standard_nat_tm"),
+}
+
 # Format competition
 comp_map_full = {
     "all": "All Competitions",
@@ -191,6 +355,19 @@ type_map_full = {
     "goalkeeping": "Goalkeeping Statistics"
 }
 
+# Labelled fields of the player page (#meta paragraphs): key, label pattern followed by the value
+player_info_fields = [
+    ("position", r"Position\s*: ?"),
+    ("footed", r"Footed\s*: ?"),
+    ("birth", r"Born\s*: ?"),
+    ("national_team", r"National Team\s*: ?"),
+    ("club", r"Club\s*: ?"),
+    ("wages", r"Wages\s*:? ?"),
+]
+
+# Wage currencies written as symbols on FBref
+wage_currencies = {"€": "EUR", "£": "GBP", "$": "USD"}
+
 ###############################################################################################################################################
 # UTILITY FUNCTIONS
 ###############################################################################################################################################
@@ -203,12 +380,59 @@ def normalize_text(s):
     s = s.encode("ascii", "ignore").decode("utf-8")
     return s.lower().strip()
 
+def core_stat_name(category, stat):
+    """Name of a stat in extract_core_stats: ('Playing Time', 'MP') -> 'playing_time_mp'."""
+    def clean(s):
+        return s.replace(" ", "_").replace("/", "_").replace("-", "_").lower()
+    return f"{clean(category)}_{clean(stat)}"
+
+def parse_stat_value(value):
+    """
+    Converts a raw FBref cell text into int, float or None when possible.
+    Non numeric values (dates, club names...) are returned unchanged.
+    """
+    if value is None:
+        return None
+    value = value.strip()
+    if value in ("", "N/A"):
+        return None
+    cleaned = value.replace(",", "")
+    if re.match(r"^-?\d+$", cleaned):
+        return int(cleaned)
+    if re.match(r"^-?\d*\.\d+$", cleaned):
+        return float(cleaned)
+    return value
+
+def parse_season_range(season_range):
+    """
+    Parses a season range such as "2018-2019:2022-2023" (or "2018:2022").
+    Returns the (first_year, last_year) tuple, bounds included.
+    An empty bound ("2018-2019:") leaves the range open on that side.
+    """
+    start, _, end = str(season_range).partition(":")
+    try:
+        first_year = int(start.strip()[:4]) if start.strip() else None
+        last_year = int(end.strip()[:4]) if end.strip() else None
+    except ValueError:
+        raise ValueError(f"⚠️ Invalid season range : {season_range}")
+    return first_year, last_year
+
+def season_in_range(season_name, season_range):
+    """Checks whether a season ("2020-2021" or "2020") falls in a parsed season range."""
+    first_year, last_year = season_range
+    year = int(season_name[:4])
+    if first_year is not None and year < first_year:
+        return False
+    if last_year is not None and year > last_year:
+        return False
+    return True
+
 def save_season_stats_to_csv(season_stats, player_name, season, comp=None, type=None):
     """
     Saves statistics for one season or all seasons in a CSV file.
     - season_stats: dict (data returned by extract_player_season_stats_all_comps)
     - player_name: player name (string)
-    - season: season (e.g., “2023-2024”) or “All” for all seasons
+    - season: season (e.g., “2023-2024”), “All” for the career total or None for every season
     - comp: competition (e.g., “dl,” “dc,” “ic,” “nt,” “all”), optional
     """
     if not season_stats or "message" in season_stats:
@@ -216,15 +440,22 @@ def save_season_stats_to_csv(season_stats, player_name, season, comp=None, type=
         return None
 
     # Determine whether you want all seasons
-    if str(season).lower() == "all" or season is None:
+    if season is None:
+        data_to_save = season_stats
+        safe_season_name = "AllSeasons"
+    elif str(season).lower() == "all":
         data_to_save = season_stats
         safe_season_name = "All"
+    elif ":" in str(season):
+        # Season range: every extracted season is kept
+        data_to_save = season_stats
+        safe_season_name = season.replace(":", "_")
     else:
         data_to_save = {season: season_stats.get(season)}
         safe_season_name = season
 
     # Create the output folder
-    output_dir = "output/datas_player"
+    output_dir = os.path.join(OUTPUT_DIR, "datas_player")
     os.makedirs(output_dir, exist_ok=True)
 
     # Clean the player and competition names for the file name
@@ -264,50 +495,579 @@ def save_season_stats_to_csv(season_stats, player_name, season, comp=None, type=
     print(f"✅ Data recorded in : {csv_filename}")
     return csv_filename
 
+def save_scope_stats_to_csv(scope_stats, player_name, season=None, type=None):
+    """
+    Saves the cross-competition frame returned by extract_player_stats_all_scopes in a CSV file.
+    """
+    if scope_stats is None or scope_stats.empty:
+        print(f"⚠️ No data to record for {season} and csv not saved.")
+        return None
+
+    output_dir = os.path.join(OUTPUT_DIR, "datas_player")
+    os.makedirs(output_dir, exist_ok=True)
+
+    safe_player = player_name.replace(" ", "_").replace("/", "-")
+    safe_season_name = str(season or "All").replace("/", "-").replace(" ", "").replace(":", "_")
+    safe_type = type.replace("/", "-").replace(" ", "") if type else "standard"
+
+    csv_filename = os.path.join(output_dir, f"stats_{safe_player}_scopes_{safe_season_name}_{safe_type}.csv")
+    scope_stats.to_csv(csv_filename, encoding="utf-8")
+
+    print(f"✅ Data recorded in : {csv_filename}")
+    return csv_filename
+
+def iter_stat_records(season_stats, **context):
+    """
+    Yields one flat record per season, category and stat of the data returned by
+    extract_player_stats_by_competition (the rows of save_season_stats_to_csv, with typed values).
+    The context (player, comp, type...) is added to every record.
+    """
+    for season_key, categories in season_stats.items():
+        if not categories:
+            continue
+        for category, subdict in categories.items():
+            for stat, value in subdict.items():
+                yield {**context, "season": season_key, "category": category or "General",
+                       "stat": stat, "value": parse_stat_value(value)}
+
+def iter_scope_records(scope_stats, **context):
+    """
+    Yields one record per (season, scope) row of the frame returned by
+    extract_player_stats_all_scopes, with the stats nested by category.
+    """
+    for (season_key, scope), row in scope_stats.iterrows():
+        stats = {}
+        for (category, stat), value in row.items():
+            if pd.notna(value):
+                stats.setdefault(category or "General", {})[stat] = value.item() if hasattr(value, "item") else value
+        yield {**context, "season": season_key, "scope": scope, "stats": stats}
+
+def write_ndjson(record, out=None):
+    """Writes a record as one JSON line and flushes it, so that a downstream reader gets it at once."""
+    out = out or sys.stdout
+    out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+    out.flush()
+
+###############################################################################################################################################
+# PLAYER PHOTOS
+###############################################################################################################################################
+# Photos are downloaded once, resized to PHOTO_SIZE and stored as PHOTO_DIR/<sha256>.jpg: the same image
+# found at several URLs is stored once. PHOTO_DIR/index.json maps each photo URL to its file.
+
+PHOTO_LIMITERS = {}  # host -> RateLimiter, separate from the FBref budget
+PHOTO_LOCK = threading.Lock()
+
+def _load_photo_index():
+    index_path = os.path.join(PHOTO_DIR, "index.json")
+    if not os.path.exists(index_path):
+        return {}
+    with open(index_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _save_photo_index(index):
+    index_path = os.path.join(PHOTO_DIR, "index.json")
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp_path, index_path)
+
+def cache_player_photo(photo_url, timeout=15):
+    """
+    Returns the path of the local copy of a player photo, downloading and
+    resizing it the first time. Returns None if the photo cannot be downloaded.
+    """
+    with PHOTO_LOCK:
+        filename = _load_photo_index().get(photo_url)
+    if filename and os.path.exists(os.path.join(PHOTO_DIR, filename)):
+        return os.path.join(PHOTO_DIR, filename)
+
+    host = urlparse(photo_url).netloc
+    with PHOTO_LOCK:
+        limiter = PHOTO_LIMITERS.setdefault(host, RateLimiter(PHOTO_RATE_SEC))
+    limiter.acquire()
+
+    try:
+        r = CLOUDSCRAPER_SESSION.get(photo_url, timeout=timeout)
+        if r.status_code != 200:
+            print(f"⚠️ Photo not downloaded (HTTP {r.status_code}) : {photo_url}")
+            return None
+        image = ImageOps.fit(Image.open(BytesIO(r.content)).convert("RGB"), PHOTO_SIZE)
+    except Exception as e:
+        print(f"⚠️ Photo not downloaded : {e}")
+        return None
+
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", quality=85)
+    data = buffer.getvalue()
+    filename = f"{hashlib.sha256(data).hexdigest()}.jpg"
+
+    with PHOTO_LOCK:
+        os.makedirs(PHOTO_DIR, exist_ok=True)
+        path = os.path.join(PHOTO_DIR, filename)
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(data)
+        index = _load_photo_index()
+        index[photo_url] = filename
+        _save_photo_index(index)
+
+    return path
+
+def local_photo_src(photo_url, output_dir, inline=False):
+    """
+    Returns the src to use in a passport written in output_dir: a path relative
+    to output_dir, or a data URI with inline=True. Falls back to the remote URL
+    if the photo cannot be cached.
+    """
+    path = cache_player_photo(photo_url)
+    if path is None:
+        return photo_url
+    if inline:
+        with open(path, "rb") as f:
+            return "data:image/jpeg;base64," + base64.b64encode(f.read()).decode("ascii")
+    return os.path.relpath(path, output_dir).replace(os.sep, "/")
+
+###############################################################################################################################################
+# PREFETCH
+###############################################################################################################################################
+# After a search, the next request is almost always the player page or one of the competition pages of the player.
+# They are downloaded in the background at PRIORITY_PREFETCH so that the follow-up request hits the cache.
+
+PREFETCH_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fbref-prefetch")
+PREFETCH_PENDING = set()
+PREFETCH_LOCK = threading.Lock()
+
+def _interactive_waiting():
+    pending = getattr(RATE_LIMITER, "pending", None)
+    return bool(pending and pending(PRIORITY_INTERACTIVE))
+
+def _prefetch_url(url):
+    try:
+        # Back off while interactive requests are waiting for the rate budget
+        while _interactive_waiting():
+            time.sleep(0.1)
+        if get_cached_page(url) is None:
+            fetch_page(url, max_retries=1, priority=PRIORITY_PREFETCH)
+    except Exception as e:
+        print(f"⚠️ Prefetch failed ({url}) : {e}")
+    finally:
+        with PREFETCH_LOCK:
+            PREFETCH_PENDING.discard(url)
+
+def prefetch_player_pages(player_url, scopes=None, player_page=False, skip=()):
+    """
+    Warms the page cache for the most used competition pages of a player (the
+    PREFETCH_TOP_SCOPES most frequent in SCOPE_USAGE, "all" and "dl" by default),
+    and for the player page itself with player_page=True. Competitions in skip,
+    and the player page by default, are left out: the caller fetches them itself.
+    Returns immediately; the pages are downloaded one by one in the background,
+    only when no interactive request is waiting.
+    """
+    if scopes is None:
+        scopes = [comp for comp, _ in SCOPE_USAGE.most_common(PREFETCH_TOP_SCOPES + len(skip)) if comp not in skip]
+        scopes = scopes[:PREFETCH_TOP_SCOPES] or [comp for comp in ("all", "dl") if comp not in skip]
+
+    urls = [player_url] if player_page else []
+    urls += [get_competition_url(player_url, comp, track=False)[0] for comp in scopes if comp not in skip]
+    submitted = []
+    for url in urls:
+        with PREFETCH_LOCK:
+            if url in PREFETCH_PENDING or get_cached_page(url) is not None:
+                continue
+            PREFETCH_PENDING.add(url)
+        PREFETCH_EXECUTOR.submit(_prefetch_url, url)
+        submitted.append(url)
+    return submitted
+
+###############################################################################################################################################
+# TABLE SCHEMAS
+###############################################################################################################################################
+# The column map of a stats table ((category, stat) of every column) only depends on its header rows.
+# It is resolved once per layout and stored under a fingerprint of the header cells (colspan + data-stat),
+# which is read without extracting any header text. A table id may have several layouts at once (e.g. the
+# leagues without xG): each one is stored next to the others. Only a fingerprint never seen before, by this
+# process or by another one, is saved; for a known table id it is reported and counted in
+# SCHEMA_REGISTRY.stats["drifts"] (a new variant, or FBref changed the layout).
+
+def _header_fingerprint(thead):
+    """Short hash of the header rows, built from the colspan and data-stat attributes of their cells."""
+    parts = []
+    for tr in thead.find_all("tr"):
+        for th in tr.find_all("th"):
+            # Group headers may have an empty data-stat: their label is then part of the layout
+            key = th.get("data-stat") or th.get_text(strip=True)
+            parts.append(f"{th.get('colspan', '1')}:{key}")
+        parts.append("/")
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+class TableSchemaRegistry:
+    """
+    Column maps of the stats tables, keyed by table id and header fingerprint.
+    column_map() returns the (categories, subheaders) tuples of a table, from
+    the registry when the layout is known. The layouts are saved in path
+    (JSON) so that they are shared between runs and processes.
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.stats = Counter()  # hits, new_layouts, drifts
+        self._lock = threading.Lock()
+        self._schemas = None
+
+    def _read_file(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_file(self):
+        if not self.path:
+            return
+        # Keep the layouts recorded meanwhile by other processes
+        merged = self._read_file()
+        for table_id, layouts in self._schemas.items():
+            merged.setdefault(table_id, {}).update(layouts)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(merged, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def _reload(self):
+        """Adds the layouts saved by other processes to the ones in memory."""
+        for table_id, layouts in self._read_file().items():
+            self._schemas.setdefault(table_id, {}).update(layouts)
+
+    def column_map(self, table_id, table):
+        thead = table.find("thead")
+        if thead is None:
+            raise ValueError(f"⚠️ No header found in the table with id '{table_id}'.")
+        fingerprint = _header_fingerprint(thead)
+
+        with self._lock:
+            if self._schemas is None:
+                self._schemas = self._read_file()
+            elif fingerprint not in self._schemas.get(table_id, {}):
+                self._reload()
+            schema = self._schemas.get(table_id, {}).get(fingerprint)
+            if schema is not None:
+                self.stats["hits"] += 1
+                return tuple(schema["categories"]), tuple(schema["subheaders"])
+
+        categories, subheaders = _extract_table_headers(table)
+
+        with self._lock:
+            layouts = self._schemas.setdefault(table_id, {})
+            if fingerprint in layouts:
+                # Recorded by another thread meanwhile
+                return tuple(categories), tuple(subheaders)
+            if layouts:
+                self.stats["drifts"] += 1
+                print(f"⚠️ New header layout for the table '{table_id}' ({len(subheaders)} columns, fingerprint {fingerprint}).")
+            self.stats["new_layouts"] += 1
+            layouts[fingerprint] = {"categories": categories, "subheaders": subheaders}
+            try:
+                self._write_file()
+            except OSError as e:
+                print(f"⚠️ Table schemas not saved : {e}")
+        return tuple(categories), tuple(subheaders)
+
+SCHEMA_REGISTRY = TableSchemaRegistry(SCHEMA_FILE)
+
+###############################################################################################################################################
+# PROJECTION
+###############################################################################################################################################
+# The extractors only read the cells of the columns and rows kept by a projection: the other cells are
+# skipped during the walk (no text extraction, no dictionary entry).
+
+class StatProjection:
+    """
+    Subset of a stats table to extract. None keeps everything.
+    - stats: FBref labels ("Gls") or extract_core_stats names ("performance_gls")
+    - categories: FBref categories ("Performance")
+    - seasons: seasons to keep ("2022-2023")
+    - exclude: extract_core_stats names to drop (e.g. excluded_stats[type])
+    """
+    def __init__(self, stats=None, categories=None, seasons=None, exclude=None):
+        self.stats = {s.strip().lower() for s in stats} if stats is not None else None
+        self.categories = {c.strip().lower() for c in categories} if categories is not None else None
+        self.seasons = set(seasons) if seasons is not None else None
+        self.exclude = set(exclude or ())
+
+    @classmethod
+    def for_comparison(cls, stat_type, stats=None):
+        """Projection of the comparison charts: the stats they drop are not extracted."""
+        return cls(stats=stats, exclude=excluded_stats.get(stat_type, []))
+
+    def columns(self, categories, subheaders):
+        """Indexes of the kept columns (the first column, season or date, is always read)."""
+        kept = []
+        for idx in range(1, len(subheaders)):
+            category, stat = categories[idx], subheaders[idx]
+            core_name = core_stat_name(category, stat)
+            if self.categories is not None and category.lower() not in self.categories:
+                continue
+            if self.stats is not None and stat.lower() not in self.stats and core_name not in self.stats:
+                continue
+            if core_name in self.exclude:
+                continue
+            kept.append(idx)
+        return kept
+
+    def keeps_season(self, season_name):
+        return self.seasons is None or season_name in self.seasons
+
 ###############################################################################################################################################
 # MAIN FUNCTIONS
 ###############################################################################################################################################
 
-def fetch_page(url, max_retries=3, timeout=15, use_cloudscraper_on_block=True):
+def get_cached_page(url):
+    """Returns the cached html of the url, or None if it is missing or expired."""
+    with PAGE_CACHE_LOCK:
+        entry = PAGE_CACHE.get(url)
+        if entry is None:
+            return None
+        fetched_at, html = entry
+        if time.monotonic() - fetched_at > CACHE_TTL_SEC:
+            del PAGE_CACHE[url]
+            return None
+        PAGE_CACHE.move_to_end(url)
+        return html
+
+def cache_page(url, html):
+    """Stores a downloaded page in the cache."""
+    with PAGE_CACHE_LOCK:
+        PAGE_CACHE[url] = (time.monotonic(), html)
+        PAGE_CACHE.move_to_end(url)
+        while len(PAGE_CACHE) > CACHE_MAX_PAGES:
+            PAGE_CACHE.popitem(last=False)
+
+def _wait_in_flight(url, timeout):
+    """Waits for a download of the url in progress in another thread, then returns the cached html or None."""
+    with PAGE_CACHE_LOCK:
+        event = PAGES_IN_FLIGHT.get(url)
+    if event is not None:
+        event.wait(timeout)
+    return get_cached_page(url)
+
+def _claim_download(url, timeout):
+    """
+    Called once the rate budget granted a slot: returns the cached html if a
+    concurrent request (e.g. a prefetch) fetched the page meanwhile, otherwise
+    registers the download in PAGES_IN_FLIGHT and returns None.
+    """
+    while True:
+        html = get_cached_page(url)
+        if html is not None:
+            return html
+        with PAGE_CACHE_LOCK:
+            event = PAGES_IN_FLIGHT.get(url)
+            if event is None:
+                PAGES_IN_FLIGHT[url] = threading.Event()
+                return None
+        if not event.wait(timeout):
+            return None
+
+def _release_download(url):
+    with PAGE_CACHE_LOCK:
+        event = PAGES_IN_FLIGHT.pop(url, None)
+    if event is not None:
+        event.set()
+
+def validate_page(html):
+    """
+    Cheap check of a page answered with a 200, without parsing it.
+    Returns None for a valid page, otherwise the reason: "empty", "challenge" or "truncated".
+    """
+    if html is None or len(html) < MIN_PAGE_CHARS or not html.strip():
+        return "empty"
+    head = html[:8192].lower()
+    if any(marker in head for marker in CHALLENGE_MARKERS):
+        return "challenge"
+    # A complete document ends with its closing tag (comments may follow it)
+    if "</html>" not in html[-8192:].lower():
+        return "truncated"
+    return None
+
+def refresh_session(stale_session=None):
+    """
+    Replaces the shared cloudscraper session (new cookies and challenge state).
+    When stale_session is given, the session is only replaced if no other thread did it meanwhile.
+    """
+    global CLOUDSCRAPER_SESSION
+    with SESSION_LOCK:
+        if stale_session is None or CLOUDSCRAPER_SESSION is stale_session:
+            session = cloudscraper.create_scraper()
+            session.headers.update(DEFAULT_HEADERS)
+            CLOUDSCRAPER_SESSION = session
+        return CLOUDSCRAPER_SESSION
+
+def fetch_page(url, max_retries=3, timeout=15, use_cloudscraper_on_block=True, use_cache=True,
+               priority=PRIORITY_INTERACTIVE):
     """
     Download the page and return (status_code, html or None).
+    Pages already downloaded less than CACHE_TTL_SEC ago are served from the cache.
+    The priority (PRIORITY_INTERACTIVE or PRIORITY_BULK) selects the queue
+    used to wait for the rate budget.
+    A 200 that fails validate_page is neither cached nor archived: the session
+    is refreshed and the request retried.
+    A page being downloaded by another thread (e.g. a prefetch) is not requested
+    twice: the second request waits for the first one and reads the cache.
     """
+    if use_cache:
+        html = _wait_in_flight(url, timeout)
+        if html is not None:
+            return 200, html
+
     last_status = None
     
     # Cloudscraper attempt
     if use_cloudscraper_on_block:
         for attempt in range(max_retries):
+            RATE_LIMITER.acquire(priority)
+            if use_cache:
+                # The page may have been downloaded by another request while this one waited for its slot
+                html = _claim_download(url, timeout)
+                if html is not None:
+                    return 200, html
+            session = CLOUDSCRAPER_SESSION
             try:
-                r = CLOUDSCRAPER_SESSION.get(url, timeout=timeout, allow_redirects=True)
+                r = session.get(url, timeout=timeout, allow_redirects=True)
             except Exception as e:
                 last_status = f"cloudscraper exception: {e}"
+                if use_cache:
+                    _release_download(url)
                 time.sleep(2 ** attempt)
                 continue
 
             last_status = getattr(r, "status_code", None)
             if getattr(r, "status_code", None) == 200:
-                time.sleep(RATE_SEC)
+                reason = validate_page(r.text)
+                if reason:
+                    PAGE_REJECTS[reason] += 1
+                    print(f"⚠️ {reason.capitalize()} page received for {url}, new session and retry ({attempt + 1}/{max_retries}).")
+                    last_status = f"{reason} page"
+                    if use_cache:
+                        _release_download(url)
+                    refresh_session(session)
+                    time.sleep(2 ** attempt)
+                    continue
+                if use_cache:
+                    cache_page(url, r.text)
+                    _release_download(url)
+                if PAGE_ARCHIVE is not None:
+                    try:
+                        PAGE_ARCHIVE.store(url, r.text)
+                    except Exception as e:
+                        print(f"⚠️ Page not archived ({url}) : {e}")
                 return r.status_code, r.text
 
+            if use_cache:
+                _release_download(url)
             time.sleep(2 ** attempt)
 
     # Return code/error
     return (last_status or 0), None
 
 
-def fbref_search(name):
+def _read_element(response, element_id, chunk_size=16384, sample_size=8192):
+    """
+    Feeds the response bytes to an incremental HTML parser and returns
+    (html of the element with this id, None) as soon as its closing tag is read.
+    When the page ends without the element, returns (None, sample): the first
+    and last sample_size bytes of the page, enough for validate_page.
+    Elements outside the target are freed once parsed, so the page is never
+    held in memory as a whole.
+    """
+    parser = etree.HTMLPullParser(events=("start", "end"), encoding="utf-8")
+    inside = 0  # depth inside the target element
+    head, tail = b"", b""
+
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        if len(head) < sample_size:
+            head += chunk[:sample_size - len(head)]
+        tail = (tail + chunk)[-sample_size:]
+        parser.feed(chunk)
+        for event, element in parser.read_events():
+            if event == "start":
+                if inside or element.get("id") == element_id:
+                    inside += 1
+                continue
+
+            if inside:
+                inside -= 1
+                if inside == 0:
+                    return etree.tostring(element, encoding="unicode", method="html", with_tail=False), None
+            else:
+                element.clear()
+
+    sample = head if len(head) < sample_size else head + b"\n" + tail
+    return None, sample.decode("utf-8", errors="replace")
+
+def fetch_element(url, element_id, max_retries=3, timeout=15, stop_early=True, priority=PRIORITY_INTERACTIVE):
+    """
+    Streaming variant of fetch_page for when only one element of the page is
+    needed (a stats table, the "meta" block of a player page...).
+    Returns (status_code, html of the element, "" if the page does not contain
+    it, or None on error). With stop_early, the
+    download is interrupted as soon as the element is complete.
+    When the element is missing, the start and end of the page go through
+    validate_page: a challenge, empty or truncated page is retried with a new
+    session like in fetch_page, and "" is only returned for a complete page.
+    The element is cached under url#element_id; a page already cached in full
+    is used directly. Partial pages are not archived.
+    """
+    cache_key = f"{url}#{element_id}"
+    html = get_cached_page(cache_key) or get_cached_page(url)
+    if html is not None:
+        return 200, html
+
+    last_status = None
+    for attempt in range(max_retries):
+        RATE_LIMITER.acquire(priority)
+        session = CLOUDSCRAPER_SESSION
+        try:
+            with session.get(url, timeout=timeout, allow_redirects=True, stream=True) as r:
+                last_status = r.status_code
+                if r.status_code == 200:
+                    fragment, sample = _read_element(r, element_id)
+                    if fragment is None:
+                        reason = validate_page(sample)
+                        if not reason:
+                            # Complete page without the element
+                            return 200, ""
+                        PAGE_REJECTS[reason] += 1
+                        print(f"⚠️ {reason.capitalize()} page received for {url}, new session and retry ({attempt + 1}/{max_retries}).")
+                        last_status = f"{reason} page"
+                        refresh_session(session)
+                    else:
+                        if not stop_early:
+                            # Read the end of the response so that the connection can be reused
+                            for _ in r.iter_content(chunk_size=65536):
+                                pass
+                        cache_page(cache_key, fragment)
+                        return 200, fragment
+        except Exception as e:
+            last_status = f"cloudscraper exception: {e}"
+
+        time.sleep(2 ** attempt)
+
+    return (last_status or 0), None
+
+def fbref_search(name, priority=PRIORITY_INTERACTIVE):
     """
     Search for a player on FBref by name.
+    The priority selects the queue of the rate budget (PRIORITY_BULK for batches).
     """
     q = quote_plus(name)
     url = f"{BASE}/search/search.fcgi?search={q}"
-    status, html = fetch_page(url, max_retries=3, timeout=15, use_cloudscraper_on_block=True)
+    status, html = fetch_page(url, max_retries=3, timeout=15, use_cloudscraper_on_block=True, priority=priority)
 
     if status != 200 or not html:
         # Message for debugging
         raise RuntimeError(f"HTTP error {status} during search or empty page.")
-    # Compliance with the overall deadline
-    time.sleep(RATE_SEC)
     
     soup = BeautifulSoup(html, "lxml")
 
@@ -357,17 +1117,83 @@ def fbref_search(name):
     else:
         raise ValueError(f"❌ No players found matching '{name}'.")
 
+# Compiled once: the #meta fragments are classified in a single pass
+META_STRAINER = SoupStrainer(id="meta")
+META_SPLIT_RE = re.compile(r"\s*[▪•·|/]\s*")
+SPACES_RE = re.compile(r"\s+")
+META_FIELD_RE = re.compile(
+    "(?:" + "|".join(f"(?P<{key}>{label})" for key, label in player_info_fields) + ")(?P<value>.+)",
+    flags=re.I
+)
+META_KEYWORD_RE = re.compile(r"\b(position|born|footed|national team|club|wages)\b")
+HEIGHT_RE = re.compile(r"(\d+)\s*cm\b")
+WEIGHT_RE = re.compile(r"(\d+)\s*kg\b")
+BIRTH_DATE_RE = re.compile(r"([A-Z][a-z]+ \d{1,2}, \d{4})")
+# Currency before ("€ 1,200,000") or after ("20,446,667 $") the amount
+WAGE_RE = re.compile(r"([€£$]|\b[A-Z]{3}\b)\s*(\d[\d,]*)|(\d[\d,]*)\s*([€£$]|\b[A-Z]{3}\b)")
+WAGE_PERIOD_RE = re.compile(r"\b(annual|weekly)\b", flags=re.I)
+NAME_FORBIDDEN_KEYWORDS = ("position", "born", "footed", "national team", "club", "wages", "height", "weight")
+NAME_FORBIDDEN_POSITIONS = (
+    "defender", "midfielder", "forward", "goalkeeper", "centre-back",
+    "center-back", "winger", "striker", "attacking", "defensive"
+)
+
+def _is_full_name(part, part_norm, search_norm, search_tokens):
+    """Detects full_name even if the form differs (e.g., “Cristiano Ronaldo” vs. “Cristiano Ronaldo dos Santos Aveiro”)."""
+    if any(tok in search_tokens for tok in part_norm.split()) or part_norm.startswith(search_norm):
+        return True
+    # Overall similarity to tolerate different additions/order/punctuation
+    return SequenceMatcher(None, search_norm, part_norm).ratio() >= 0.70
+
+def _is_potential_name(part, part_norm):
+    """First meaningful text block, used when the full name does not look like the page name."""
+    return (
+        len(part.split()) >= 2
+        and not any(key in part_norm for key in NAME_FORBIDDEN_KEYWORDS)
+        and not any(pos in part_norm for pos in NAME_FORBIDDEN_POSITIONS)
+        and not re.search(r"\d", part)
+        and ":" not in part
+    )
+
+def _parse_birth_date(birth):
+    """'July 13, 2007 in ...' -> '2007-07-13' (None when the date is missing)."""
+    m = BIRTH_DATE_RE.search(birth)
+    if not m:
+        return None
+    try:
+        return datetime.strptime(m.group(1), "%B %d, %Y").date().isoformat()
+    except ValueError:
+        return None
+
+def _parse_wages(wages):
+    """
+    '€ 1,200,000 Annual.' or '1,200,000 € Annual.' -> (1200000, 'EUR', 'annual'),
+    None for the missing parts.
+    """
+    m = WAGE_RE.search(wages)
+    if not m:
+        return None, None, None
+    currency, amount = (m.group(1), m.group(2)) if m.group(1) else (m.group(4), m.group(3))
+    period = WAGE_PERIOD_RE.search(wages)
+    return (
+        int(amount.replace(",", "")),
+        wage_currencies.get(currency, currency),
+        period.group(1).lower() if period else None
+    )
+
 def extract_player_info(html, base_url, name):
     """
     Extracts basic player information from their FBref page.
-    Returns a dictionary with the main fields.
+    Returns a dictionary with the main fields, plus typed fields:
+    birth_date (ISO), height_cm, weight_kg, wage_amount, wage_currency and wage_period.
     """
-    soup = BeautifulSoup(html, "lxml")
+    # Only the #meta block is built
+    soup = BeautifulSoup(html, "lxml", parse_only=META_STRAINER)
     info = {}
 
     # Main name
     # Extract the main name directly from the FBref page 
-    h1 = soup.select_one("#meta h1") or soup.find("h1", {"itemprop": "name"})
+    h1 = soup.select_one("#meta h1") or BeautifulSoup(html, "lxml", parse_only=SoupStrainer("h1", itemprop="name")).find("h1")
     if h1:
         info["name"] = h1.get_text(strip=True)
     else:
@@ -375,128 +1201,77 @@ def extract_player_info(html, base_url, name):
         info["name"] = "Name not found"
     # Normalized for comparisons below
     search_norm = normalize_text(info["name"])
-
-    p_tags = soup.select("#meta p")
-    for p in p_tags:
-        raw = p.get_text(" ", strip=True)
-        # Standardize whitespaces
-        raw = re.sub(r"\s+", " ", raw)
-        # Split across multiple common separators
-        parts = re.split(r"\s*[▪•·|/]\s*", raw)
-        for part in parts:
-            part = part.strip()
-            if not part:
-                continue
-            
-            part_norm = normalize_text(part)
-            
-            # Initialize default values once
-            if not info.get("_meta_inited"):
-                defaults = {
-                    "full_name": "Unknown",
-                    "position": "Unknown",
-                    "footed": "Unknown",
-                    "birth": "Unknown",
-                    "national_team": "Unknown",
-                    "club": "Unknown",
-                    "wages": "Unknown",
-                }
-                for k, v in defaults.items():
-                    info.setdefault(k, v)
-                info["_meta_inited"] = True
-
-            # Detects full_name even if the form differs (e.g., “Cristiano Ronaldo” vs. “Cristiano Ronaldo dos Santos Aveiro”)
-            if search_norm and not re.search(r"\b(position|born|footed|national team|club|wages)\b", part_norm):
-                # Comparison by tokens: all tokens of the search name present in the candidate string
-                search_tokens = set(search_norm.split())
-                part_tokens = set(part_norm.split())
-                token_match = any(tok in part_tokens for tok in search_tokens)
-
-                # Overall similarity to tolerate different additions/order/punctuation
-                ratio = SequenceMatcher(None, search_norm, part_norm).ratio()
-                similar = ratio >= 0.70
-
-                # Accept if one of the criteria is met
-                if token_match or similar or part_norm.startswith(search_norm):
-                    if info.get("full_name") in (None, "", "Unknown"):
-                        info["full_name"] = part.strip()
-                    continue
-            
-            # If full_name still not found, try detecting the first meaningful text block
-            if info.get("full_name") in (None, "", "Unknown"):
-
-                forbidden_keywords = {
-                    "position", "born", "footed", "national team",
-                    "club", "wages", "height", "weight"
-                }
-
-                football_positions = {
-                    "defender", "midfielder", "forward", "goalkeeper",
-                    "centre-back", "center-back", "winger", "striker",
-                    "attacking", "defensive"
-                }
-
-                # Conditions for potential name
-                is_potential_name = (
-                    len(part.split()) >= 2
-                    and not any(key in part_norm for key in forbidden_keywords)
-                    and not any(pos in part_norm for pos in football_positions)
-                    and not re.search(r"\d", part)
-                    and ":" not in part
-                )
-
-                if is_potential_name:
-                    info["full_name"] = part.strip()
-                    continue
-
-            # Position
-            m = re.search(r"Position\s*: ?(.+)", part, flags=re.I)
-            if m:
-                info["position"] = m.group(1).strip()
+    search_tokens = set(search_norm.split())
+
+    # Split across multiple common separators
+    parts = [
+        part
+        for p in soup.select("#meta p")
+        for part in META_SPLIT_RE.split(SPACES_RE.sub(" ", p.get_text(" ", strip=True)))
+        if part.strip()
+    ]
+    if parts:
+        info.update({
+            "full_name": "Unknown",
+            "position": "Unknown",
+            "footed": "Unknown",
+            "birth": "Unknown",
+            "national_team": "Unknown",
+            "club": "Unknown",
+            "wages": "Unknown",
+            "birth_date": None,
+            "height_cm": None,
+            "weight_kg": None,
+            "wage_amount": None,
+            "wage_currency": None,
+            "wage_period": None,
+        })
+
+    for part in parts:
+        part = part.strip()
+        part_norm = normalize_text(part)
+
+        # Full name, unless the fragment is a labelled field
+        if search_norm and not META_KEYWORD_RE.search(part_norm):
+            if _is_full_name(part, part_norm, search_norm, search_tokens):
+                if info["full_name"] == "Unknown":
+                    info["full_name"] = part
                 continue
-
-            # Footed 
-            m = re.search(r"Footed\s*: ?(.+)", part, flags=re.I)
-            if m:
-                info["footed"] = m.group(1).strip()
-                continue
-
-            # Born
-            m = re.search(r"Born\s*: ?(.+)", part, flags=re.I)
-            if m:
-                info["birth"] = m.group(1).strip()
-                continue
-
-            # National Team
-            m = re.search(r"National Team\s*: ?(.+)", part, flags=re.I)
-            if m:
-                info["national_team"] = m.group(1).strip()
+            if info["full_name"] == "Unknown" and _is_potential_name(part, part_norm):
+                info["full_name"] = part
                 continue
 
-            # Club
-            m = re.search(r"Club\s*: ?(.+)", part, flags=re.I)
-            if m:
-                info["club"] = m.group(1).strip()
-                continue
-
-            # Wages 
-            m = re.search(r"Wages\s*: ?(.+)", part, flags=re.I)
-            if m:
-                val = m.group(1).strip()
+        # Labelled field (Position, Footed, Born, National Team, Club, Wages)
+        m = META_FIELD_RE.search(part)
+        if m:
+            key = next(key for key, _ in player_info_fields if m.group(key) is not None)
+            value = m.group("value").strip()
+            if key == "wages":
                 # Keep only the first sentence (up to and including the first period)
-                dot = val.find('.')
+                dot = value.find(".")
                 if dot != -1:
-                    val = val[:dot+1].strip()
-                info["wages"] = val or "Unknown"
-                continue
+                    value = value[:dot+1].strip()
+                value = value or "Unknown"
+            info[key] = value
+            continue
+
+        # Height and weight ("180cm, 72kg (5-11, 158lb)")
+        height, weight = HEIGHT_RE.search(part), WEIGHT_RE.search(part)
+        if height:
+            info["height_cm"] = int(height.group(1))
+        if weight:
+            info["weight_kg"] = int(weight.group(1))
+
+    # Typed fields
+    if parts:
+        birth_tag = soup.select_one("#necro-birth[data-birth]")
+        info["birth_date"] = birth_tag["data-birth"] if birth_tag else _parse_birth_date(info["birth"])
+        info["wage_amount"], info["wage_currency"], info["wage_period"] = _parse_wages(info["wages"])
 
     # Photo of the player 
     img_tag = soup.select_one("#meta img")
     if img_tag and img_tag.get("src"):
-        img_src = img_tag["src"]
-        if img_src.startswith("/"):
-            img_src = base_url + img_src
-        info["photo_url"] = img_src
+        info["photo_url"] = urljoin(base_url, img_tag["src"])
     
     if not info: 
         print("⚠️ Unable to retrieve player information.")
@@ -504,28 +1279,98 @@ def extract_player_info(html, base_url, name):
 
     return info
 
-def generate_player_passeport(player_info):
-    """Generates a passport image for the player with the extracted information."""
+@lru_cache(maxsize=None)
+def get_passport_template(template_dir="templates"):
+    """
+    Returns the compiled passport template. The Jinja environment and the
+    template are built once and kept for the life of the process.
+    """
+    env = Environment(loader=FileSystemLoader(template_dir))
+    return env.get_template("passport_template.html")
+
+def generate_player_passeport(player_info, inline_photo=False):
+    """
+    Generates a passport image for the player with the extracted information.
+    The photo is served from the local cache (as a data URI with inline_photo=True).
+    """
     
     # Generate the player's passport in HTML
-    template_path = os.path.join("templates", "passport_template.html")
-    output_html = os.path.join("output/passport_player", f"passport_{player_info.get("name").replace(" ", "")}.html")
-        
-    with open(template_path, "r", encoding="utf-8") as f:
-        template_str = f.read()
+    output_dir = os.path.join(OUTPUT_DIR, "passport_player")
+    output_html = os.path.join(output_dir, f"passport_{player_info.get("name").replace(" ", "")}.html")
+
+    if str(player_info.get("photo_url", "")).startswith(("http://", "https://")):
+        player_info = {**player_info, "photo_url": local_photo_src(player_info["photo_url"], output_dir, inline_photo)}
 
-    template = Template(template_str)
-    html_content = template.render(**player_info)
+    html_content = get_passport_template().render(**player_info)
         
-    os.makedirs("output/passport_player", exist_ok=True)
+    os.makedirs(output_dir, exist_ok=True)
     with open(output_html, "w", encoding="utf-8") as f:
         f.write(html_content)
 
     print(f"✅ Generated HTML : {output_html}")
     return html_content, output_html
 
+def _generate_passport_for_name(name, write_file=True):
+    """
+    Search, fetch, parse and render the passport of one player (used by generate_player_passports).
+    A player page URL is fetched directly, without search. Returns (name, html, path or None).
+    """
+    if is_player_url(name):
+        chosen, name = name, ""
+    else:
+        _, chosen = fbref_search(name, priority=PRIORITY_BULK)["players"][0]
+    status, html = fetch_page(chosen, priority=PRIORITY_BULK)
+    if status != 200 or not html:
+        raise RuntimeError(f"HTTP error {status} while downloading the page of {name or chosen}.")
+
+    player_info = extract_player_info(html, chosen, name)
+    name = name or player_info.get("name") or chosen
+    if write_file:
+        return (name, *generate_player_passeport(player_info))
+    if player_info.get("photo_url"):
+        player_info["photo_url"] = local_photo_src(player_info["photo_url"], os.path.join(OUTPUT_DIR, "passport_player"))
+    return name, get_passport_template().render(**player_info), None
+
+def generate_player_passports(names, bundle=False, max_workers=8):
+    """
+    Generates the passports of several players, given by name or by player
+    page URL (see squad_player_urls): a URL costs one request, a name two
+    (search and page).
+    Players are processed concurrently: the pages are fetched at PRIORITY_BULK
+    under the shared rate budget while the pages already received are parsed and rendered.
+    - bundle=False: one HTML file per player (as generate_player_passeport)
+    - bundle=True: a single index page embedding every passport
+    Returns (passports, errors): passports is a list of (name, html, path or None),
+    errors a list of (name, message).
+    """
+    passports, errors = [], []
+    # Compile the template before the workers start
+    get_passport_template()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [(name, executor.submit(_generate_passport_for_name, name, not bundle)) for name in names]
+        for name, future in futures:
+            try:
+                passports.append(future.result())
+            except Exception as e:
+                print(f"❌ Passport of {name} not generated : {e}")
+                errors.append((name, str(e)))
+
+    if bundle and passports:
+        output_html = os.path.join(OUTPUT_DIR, "passport_player", "passports_bundle.html")
+        os.makedirs(os.path.dirname(output_html), exist_ok=True)
+        with open(output_html, "w", encoding="utf-8") as f:
+            f.write("<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"UTF-8\">\n<title>Player Passports</title>\n</head>\n<body>\n")
+            for name, html_content, _ in passports:
+                f.write(f'<h2>{escape(name)}</h2>\n<iframe srcdoc="{escape(html_content)}" style="width:100%;height:600px;border:none;"></iframe>\n')
+            f.write("</body>\n</html>\n")
+        passports = [(name, html_content, output_html) for name, html_content, _ in passports]
+        print(f"✅ Generated HTML : {output_html}")
 
-def get_competition_url(player_url, comp="all"):
+    return passports, errors
+
+
+def get_competition_url(player_url, comp="all", track=True):
     """
     Builds the complete URL and also returns the ID of the corresponding table,
     depending on the competition selected:
@@ -537,6 +1382,7 @@ def get_competition_url(player_url, comp="all"):
     Example:
       https://fbref.com/en/players/82ec26c1/Lamine-Yamal
         -> “dl”  → https://fbref.com/en/players/82ec26c1/dom_lg/Lamine-Yamal-Domestic-League-Stats
+    With track=True, the request is counted in SCOPE_USAGE (used by the prefetcher).
     """
     comp = str(comp).lower()
     parsed = urlparse(player_url)
@@ -548,38 +1394,65 @@ def get_competition_url(player_url, comp="all"):
     player_id = parts[2]
     player_name = parts[3]
 
-    # Competitions dictionary
-    comp_map = {
-        "all": ("all_comps", f"{player_name}-Stats---All-Competitions", "stats_standard_collapsed"),
-        "dl":  ("dom_lg",  f"{player_name}-Domestic-League-Stats",       "stats_standard_dom_lg"),
-        "dc":  ("dom_cup", f"{player_name}-Domestic-Cup-Stats",          "stats_standard_dom_cup"),
-        "ic":  ("intl_cup", f"{player_name}-International-Cup-Stats",    "stats_standard_intl_cup"),
-        "nt":  ("nat_tm",  f"{player_name}-National-Team-Stats",         "stats_standard_nat_tm"),
-    }
-
-    if comp not in comp_map:
+    if comp not in competition_pages:
         raise ValueError(f" ⚠️ Unknown type of competition : {comp}")
+    if track:
+        SCOPE_USAGE[comp] += 1
 
-    folder, suffix, table_id = comp_map[comp]
+    folder, suffix, table_id = competition_pages[comp]
 
-    comp_path = f"/en/players/{player_id}/{folder}/{suffix}"
+    comp_path = f"/en/players/{player_id}/{folder}/{player_name}{suffix}"
     full_url = f"{parsed.scheme}://{parsed.netloc}{comp_path}"
 
     return full_url, table_id
-     
-def extract_player_stats_by_competition(html, table_id, season):
+
+def parse_competition_url(comp_url):
     """
-    Extracts statistics for the given season from the 'All Competitions' page.
-    Returns a dictionary with statistics organized by category.
+    Reverse of get_competition_url: returns (player_id, player_name, comp)
+    for a competition page URL, or None if the URL is not one.
+    Example:
+      https://fbref.com/en/players/82ec26c1/dom_lg/Lamine-Yamal-Domestic-League-Stats
+        -> ("82ec26c1", "Lamine-Yamal", "dl")
     """
-    soup = BeautifulSoup(html, "lxml")
-    
-    # Look for the table first
-    table = soup.find("table", id=table_id)
-    if not table:
-        raise ValueError(f"⚠️ Table with id '{table_id}' not found on the page.")
+    parts = urlparse(comp_url).path.strip("/").split("/")
+    if len(parts) != 5 or parts[1] != "players":
+        return None
+
+    for comp, (folder, suffix, _) in competition_pages.items():
+        if parts[3] == folder and parts[4].endswith(suffix):
+            return parts[2], parts[4][:-len(suffix)], comp
+    return None
+     
+PLAYER_URL_RE = re.compile(r"^https?://[^/]+/en/players/[0-9a-f]{8}/[^/]+$")
 
-    # Extract headers 
+def is_player_url(value):
+    """True for the URL of a player page (https://fbref.com/en/players/<id>/<name>)."""
+    return bool(PLAYER_URL_RE.match(str(value).strip()))
+
+def squad_player_urls(squad_url, priority=PRIORITY_BULK):
+    """
+    Returns the player page URLs listed in the stats table of a squad page
+    (e.g. https://fbref.com/en/squads/206d90db/Barcelona-Stats), in table order.
+    One request gives the URLs of a whole squad, without any search.
+    """
+    status, html = fetch_page(squad_url, priority=priority)
+    if status != 200 or not html:
+        raise RuntimeError(f"HTTP error {status} while downloading the squad page.")
+    soup = BeautifulSoup(html, "lxml", parse_only=SoupStrainer("th", attrs={"data-stat": "player"}))
+    urls = []
+    for a in soup.select('a[href^="/en/players/"]'):
+        url = urljoin(BASE, a["href"])
+        if is_player_url(url) and url not in urls:
+            urls.append(url)
+    if not urls:
+        raise ValueError("⚠️ No player found on the squad page.")
+    return urls
+
+def _extract_table_headers(table):
+    """
+    Returns the (categories, subheaders) lists of a FBref stats table,
+    aligned column by column.
+    """
     thead = table.find("thead")
     categories = []
     subheaders = []
@@ -617,8 +1490,29 @@ def extract_player_stats_by_competition(html, table_id, season):
         if categories[i] != "" and categories[i-1] == "":
             categories[i-1] = categories[i]
             break
+
+    return categories, subheaders
+
+def extract_player_stats_by_competition(html, table_id, season, projection=None):
+    """
+    Extracts statistics for the given season from the 'All Competitions' page.
+    The season can be a single season, a range ("2018-2019:2022-2023"),
+    "all" for the career total or None for every season.
+    projection (StatProjection) restricts the stats, categories and seasons read.
+    Returns a dictionary with statistics organized by category.
+    """
+    soup = BeautifulSoup(html, "lxml")
+    
+    # Look for the table first
+    table = soup.find("table", id=table_id)
+    if not table:
+        raise ValueError(f"⚠️ Table with id '{table_id}' not found on the page.")
+
+    # Extract headers (copies: the registry keeps the original map)
+    categories, subheaders = map(list, SCHEMA_REGISTRY.column_map(table_id, table))
         
     season_data = {}
+    season_range = parse_season_range(season) if season is not None and ":" in str(season) else None
     
     if season is not None and str(season).lower() == "all":
         tfoot = table.find("tfoot")
@@ -634,6 +1528,9 @@ def extract_player_stats_by_competition(html, table_id, season):
         if not tbody:
             raise ValueError (f"⚠️ No table body found in the table with id '{table_id}'.")
         rows = tbody.find_all("tr")
+
+    # Columns read in every row
+    columns = projection.columns(categories, subheaders) if projection else range(1, len(subheaders))
         
     for row in rows:
         cells = row.find_all(["th", "td"])
@@ -646,18 +1543,23 @@ def extract_player_stats_by_competition(html, table_id, season):
         # Accept either YYYY-YYYY or YYYY
         elif not re.match(r"^\d{4}(-\d{4})?$", season_name):
             continue
+        # Skip rows outside of a season range (e.g. "2018-2019:2022-2023")
+        elif season_range and not season_in_range(season_name, season_range):
+            continue
+        elif projection and not projection.keeps_season(season_name):
+            continue
         
         # Create the structure for the season that is so lacking
         if season_name not in season_data:
             season_data[season_name] = {}
             
         # Associate each subheader with its category and value
-        for idx, cell in enumerate(cells[1:], start=1):
-            if idx >= len(subheaders):
+        for idx in columns:
+            if idx >= len(cells):
                 break
             cat = categories[idx]
             sub = subheaders[idx]
-            val = cell.get_text(strip=True) or "N/A"
+            val = cells[idx].get_text(strip=True) or "N/A"
 
             if cat not in season_data[season_name]:
                 season_data[season_name][cat] = {}
@@ -666,11 +1568,181 @@ def extract_player_stats_by_competition(html, table_id, season):
     
     if season is None or str(season).lower() == "all" :
         return season_data
+    elif season_range:
+        if not season_data:
+            raise ValueError (f"⚠️ No season found in the range '{season}'.")
+        return season_data
     elif season in season_data:
         return {season: season_data[season]}
     else:
         raise ValueError (f"⚠️ Season '{season}' not found in the data.")
     
+def _extract_scope_stats(player_url, scope, stat_type, season, projection=None):
+    """
+    Fetches and parses the table of one competition scope.
+    Returns {} when the player has no table for this scope.
+    """
+    comp_url, _ = get_competition_url(player_url, comp=scope)
+    table_id = get_table_id_for_type(stat_type, scope)
+
+    status, html = fetch_page(comp_url)
+    if status != 200 or not html:
+        raise RuntimeError(f"HTTP error {status} while downloading the '{scope}' page.")
+
+    try:
+        return extract_player_stats_by_competition(html, table_id, season=season, projection=projection)
+    except ValueError:
+        # No table or no season in the selection for this scope
+        return {}
+
+def extract_player_stats_all_scopes(player_url, stat_type="standard", scopes=("all", "dl", "dc", "ic", "nt"), season=None,
+                                    projection=None):
+    """
+    Fetches the selected competition scopes concurrently (under the shared
+    rate budget) and merges them into a single DataFrame indexed by
+    (Season, Scope), with (Category, Stat) columns.
+    The season can be None (every season), a single season or a range
+    such as "2018-2019:2022-2023"; each page is parsed only once.
+    projection (StatProjection) restricts the stats read on every page.
+    Returns (stats_frame, reconciliation) where reconciliation is given by
+    reconcile_scope_totals.
+    """
+    scopes = [str(scope).lower() for scope in scopes]
+
+    with ThreadPoolExecutor(max_workers=len(scopes)) as executor:
+        futures = {
+            scope: executor.submit(_extract_scope_stats, player_url, scope, stat_type, season, projection)
+            for scope in scopes
+        }
+        stats_by_scope = {scope: future.result() for scope, future in futures.items()}
+
+    records = {}
+    for scope, season_data in stats_by_scope.items():
+        for season_key, categories in season_data.items():
+            records[(season_key, scope)] = {
+                (category, stat): parse_stat_value(value)
+                for category, subdict in categories.items()
+                for stat, value in subdict.items()
+            }
+
+    if not records:
+        return pd.DataFrame(), pd.DataFrame()
+
+    stats_frame = pd.DataFrame.from_dict(records, orient="index")
+    stats_frame.index.names = ["Season", "Scope"]
+    stats_frame.columns = pd.MultiIndex.from_tuples(stats_frame.columns, names=["Category", "Stat"])
+    stats_frame = stats_frame.sort_index()
+
+    return stats_frame, reconcile_scope_totals(stats_frame)
+
+def reconcile_scope_totals(stats_frame):
+    """
+    Compares, for each season, the 'all' competitions row with the sum of the
+    other scopes. Only additive columns are checked (ages, percentages and
+    per 90 values are ignored).
+    Returns a DataFrame indexed by season: 0 means the totals match.
+    """
+    if stats_frame.empty or "all" not in stats_frame.index.get_level_values("Scope"):
+        return pd.DataFrame()
+
+    additive = [
+        (category, stat) for category, stat in stats_frame.columns
+        if stat != "Age" and "%" not in stat and "90" not in category + stat
+        and pd.api.types.is_numeric_dtype(stats_frame[(category, stat)])
+    ]
+    if not additive:
+        return pd.DataFrame()
+
+    values = stats_frame[additive]
+    scopes = values.index.get_level_values("Scope")
+    all_totals = values[scopes == "all"].droplevel("Scope")
+    scope_sums = values[scopes != "all"].groupby(level="Season").sum(min_count=1)
+
+    seasons = all_totals.index.intersection(scope_sums.index)
+    return (all_totals.loc[seasons] - scope_sums.loc[seasons]).round(2)
+
+def get_matchlog_url(player_url, season, log_type="summary"):
+    """
+    Builds the URL of the match logs page of a player for a given season.
+    Example:
+      https://fbref.com/en/players/82ec26c1/Lamine-Yamal, "2024-2025"
+        -> https://fbref.com/en/players/82ec26c1/matchlogs/2024-2025/summary/Lamine-Yamal-Match-Logs
+    """
+    parsed = urlparse(player_url)
+    parts = parsed.path.strip("/").split("/")
+
+    if len(parts) < 4:
+        raise ValueError(f"URL du joueur inattendue : {player_url}")
+
+    player_id = parts[2]
+    player_name = parts[-1]
+
+    path = f"/en/players/{player_id}/matchlogs/{season}/{log_type}/{player_name}-Match-Logs"
+    return f"{parsed.scheme}://{parsed.netloc}{path}"
+
+def extract_player_match_logs(html, table_id="matchlogs_all", projection=None):
+    """
+    Extracts the match logs of a player page, one match at a time.
+    Yields a dictionary per match: {"date": ..., "stats": {category: {stat: value}}}
+    with numeric values converted by parse_stat_value.
+    projection (StatProjection) restricts the stats read.
+    """
+    soup = BeautifulSoup(html, "lxml")
+
+    table = soup.find("table", id=table_id)
+    if not table:
+        raise ValueError(f"⚠️ Table with id '{table_id}' not found on the page.")
+
+    categories, subheaders = SCHEMA_REGISTRY.column_map(table_id, table)
+
+    tbody = table.find("tbody")
+    if not tbody:
+        raise ValueError(f"⚠️ No table body found in the table with id '{table_id}'.")
+
+    columns = projection.columns(categories, subheaders) if projection else range(1, len(subheaders))
+
+    for row in tbody.find_all("tr", recursive=False):
+        # Repeated header rows and spacers inside the body
+        row_class = row.get("class") or []
+        if "thead" in row_class or "spacer" in row_class:
+            continue
+
+        cells = row.find_all(["th", "td"])
+        if not cells:
+            continue
+
+        match_date = cells[0].get_text(strip=True)
+        # Accept only YYYY-MM-DD
+        if not re.match(r"^\d{4}-\d{2}-\d{2}$", match_date):
+            continue
+
+        match_stats = {}
+        for idx in columns:
+            if idx >= len(cells):
+                break
+            cat = categories[idx]
+            sub = subheaders[idx]
+            match_stats.setdefault(cat, {})[sub] = parse_stat_value(cells[idx].get_text(strip=True))
+
+        yield {"date": match_date, "stats": match_stats}
+
+def iter_player_match_logs(player_url, seasons, log_type="summary", table_id="matchlogs_all", priority=PRIORITY_BULK,
+                           projection=None):
+    """
+    Fetches and extracts the match logs of a player for several seasons.
+    Pages are downloaded one season at a time and rows are yielded as soon as
+    they are parsed, so only one page is held in memory.
+    """
+    for season in seasons:
+        url = get_matchlog_url(player_url, season, log_type)
+        status, html = fetch_page(url, priority=priority)
+        if status != 200 or not html:
+            raise RuntimeError(f"HTTP error {status} while downloading the match logs of {season}.")
+
+        for row in extract_player_match_logs(html, table_id, projection):
+            row["season"] = season
+            yield row
+
 def extract_core_stats(stats_dict, player_name):
     """
     Extracts statistics for a player, keeping only selected categories:
@@ -690,24 +1762,8 @@ def extract_core_stats(stats_dict, player_name):
             if not isinstance(substats, dict):
                 continue
 
-            # Clean the category name
-            clean_category = (
-                category.replace(" ", "_")
-                .replace("/", "_")
-                .replace("-", "_")
-                .lower()
-            )
-
             for key, value in substats.items():
-                clean_key = (
-                    key.replace(" ", "_")
-                    .replace("/", "_")
-                    .replace("-", "_")
-                    .lower()
-                )
-
-                metric_name = f"{clean_category}_{clean_key}"
-                core_stats[metric_name] = value
+                core_stats[core_stat_name(category, key)] = value
 
     return core_stats
 
@@ -947,3 +2003,191 @@ def compare_players_radar_chart(stats_list, season, comp, type="standard"):
         height=800
     )
     return fig  
+
+def season_stats_frame(stats_dict):
+    """
+    Turns the output of extract_player_stats_by_competition into a DataFrame
+    indexed by season, with one numeric column per stat (extract_core_stats names).
+    """
+    records = {
+        season: {
+            core_stat_name(category, stat): parse_stat_value(value)
+            for category, substats in categories.items()
+            for stat, value in substats.items()
+        }
+        for season, categories in stats_dict.items()
+    }
+    frame = pd.DataFrame.from_dict(records, orient="index")
+    return frame.apply(pd.to_numeric, errors="coerce").sort_index()
+
+def _trend_column(stat, pairs):
+    """
+    Column of season_stats_frame plotted for a requested stat, among the (category, stat) pairs of the table.
+    An FBref label picks the Performance column, or the first other category holding it; the
+    Per 90 Minutes column is only picked when asked with a '/90' suffix ('Gls/90').
+    """
+    columns = [core_stat_name(category, label) for category, label in pairs]
+    if stat.lower() in columns:
+        return stat.lower()
+
+    per_90 = stat.endswith("/90")
+    wanted = stat[:-3] if per_90 else stat
+    matches = [
+        (category, label) for category, label in pairs
+        if label.lower() == wanted.lower() and category.lower().startswith("per 90") == per_90
+    ]
+    if not matches:
+        return None
+    category, label = next((pair for pair in matches if pair[0].lower() == "performance"), matches[0])
+    return core_stat_name(category, label)
+
+def compare_players_trend_chart(trends, stats, comp, type="standard"):
+    """
+    Compare players season by season, with one line per player for each stat.
+    - trends: {player name: output of extract_player_stats_by_competition with every season}
+    - stats: stats to plot, as FBref labels ('Gls', 'Gls/90' for the per 90 minutes column)
+      or extract_core_stats names ('performance_gls')
+    Players are aligned on the season; a season without data leaves a gap.
+    """
+    frames = {player: season_stats_frame(stats_dict) for player, stats_dict in trends.items()}
+    seasons = sorted(set().union(*(frame.index for frame in frames.values()))) if frames else []
+
+    # One column per requested stat, in the order given
+    pairs = list(dict.fromkeys(
+        (category, stat)
+        for stats_dict in trends.values()
+        for categories in stats_dict.values()
+        for category, substats in (categories or {}).items()
+        for stat in substats
+    ))
+    columns = []
+    for stat in stats:
+        column = _trend_column(stat, pairs)
+        if column and column not in columns:
+            columns.append(column)
+    columns = [col for col in columns if any(frame.get(col) is not None and frame[col].notna().any() for frame in frames.values())]
+
+    if not seasons or not columns:
+        print("⚠️ No statistics to plot over the seasons.")
+        return None
+
+    fig = make_subplots(
+        rows=len(columns), cols=1, shared_xaxes=True, vertical_spacing=min(0.08, 0.3 / len(columns)),
+        subplot_titles=[stat_meaning.get(col, col) for col in columns]
+    )
+    colors = ["royalblue", "crimson"] + qualitative.Plotly
+    for i, (player, frame) in enumerate(frames.items()):
+        frame = frame.reindex(seasons)
+        for row, col in enumerate(columns, start=1):
+            fig.add_trace(go.Scatter(
+                x=seasons,
+                y=frame[col] if col in frame.columns else [None] * len(seasons),
+                mode="lines+markers",
+                name=player,
+                legendgroup=player,
+                showlegend=row == 1,
+                marker_color=colors[i % len(colors)],
+                hovertemplate="<br>%{x}: %{y}<extra></extra>"
+            ), row=row, col=1)
+
+    comp_label = comp_map_full.get(str(comp).lower(), comp)
+    type_label = type_map_full.get(type, type)
+    fig.update_layout(
+        title=dict(
+            text=f"{type_label} Trend – {seasons[0]} to {seasons[-1]} - {comp_label}",
+            x=0.5,
+            xanchor="center",
+            font=dict(size=18)
+        ),
+        template="plotly_white",
+        height=max(400, 280 * len(columns))
+    )
+    return fig
+
+def _build_comparison_figure(comparison):
+    """Builds the figure described by one entry of generate_comparison_report."""
+    if comparison.get("chart") == "trend":
+        return compare_players_trend_chart(
+            comparison["trends"],
+            comparison["stats"],
+            comparison.get("comp"),
+            comparison.get("type", "standard")
+        )
+    chart_function = compare_players_radar_chart if comparison.get("chart") == "radar" else compare_players_chart
+    return chart_function(
+        comparison["stats_list"],
+        comparison.get("season"),
+        comparison.get("comp"),
+        comparison.get("type", "standard")
+    )
+
+def _build_comparison_figure_or_none(comparison):
+    """Same as _build_comparison_figure, but a failing comparison gives None instead of stopping the report."""
+    try:
+        return _build_comparison_figure(comparison)
+    except Exception as e:
+        print(f"⚠️ Comparison not generated ({comparison.get('chart', 'bar')}) : {e}")
+        return None
+
+def _write_report_page(path, figure_divs, plotlyjs_tag, title):
+    """Writes one report page, figure by figure."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"UTF-8\">\n<title>{title}</title>\n")
+        f.write(plotlyjs_tag)
+        f.write("\n</head>\n<body>\n")
+        for div in figure_divs:
+            f.write(div)
+            f.write("\n")
+        f.write("</body>\n</html>\n")
+
+def generate_comparison_report(comparisons, output_path="output/reports/comparison_report.html",
+                               figures_per_file=None, max_workers=None, title="Player Comparisons"):
+    """
+    Renders many comparisons into static HTML reports that share one plotly.js.
+    - comparisons: list of dicts with the arguments of the compare functions:
+      {"stats_list": [...], "season": ..., "comp": ..., "type": ..., "chart": "bar" or "radar"}
+      or, for a trend chart, {"trends": {...}, "stats": [...], "comp": ..., "type": ..., "chart": "trend"}
+    - figures_per_file: None to write everything in output_path with plotly.js
+      inlined once, or a number of figures per page: pages are then written next
+      to output_path and load a single plotly.min.js file.
+    Figures are built in parallel and written as soon as they are ready; a
+    comparison that cannot be built is replaced by a message, like one without
+    common statistics. Returns the list of written HTML files.
+    """
+    output_dir = os.path.dirname(output_path) or "."
+    os.makedirs(output_dir, exist_ok=True)
+    base_name, ext = os.path.splitext(os.path.basename(output_path))
+
+    if figures_per_file:
+        with open(os.path.join(output_dir, "plotly.min.js"), "w", encoding="utf-8") as f:
+            f.write(get_plotlyjs())
+        plotlyjs_tag = '<script src="plotly.min.js"></script>'
+    else:
+        plotlyjs_tag = f'<script type="text/javascript">{get_plotlyjs()}</script>'
+        figures_per_file = len(comparisons) or 1
+
+    def figure_divs(figures):
+        for comparison, fig in figures:
+            if fig is None:
+                players = ", ".join(str(s.get("Player")) for s in comparison.get("stats_list") or []) or ", ".join(comparison.get("trends") or [])
+                yield f"<p>⚠️ No common statistics to compare between {players}.</p>"
+            else:
+                yield fig.to_html(full_html=False, include_plotlyjs=False)
+
+    written = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # map() keeps the order of the comparisons while building them in parallel
+        figures = zip(comparisons, executor.map(_build_comparison_figure_or_none, comparisons))
+
+        for page, start in enumerate(range(0, len(comparisons) or 1, figures_per_file), start=1):
+            if len(comparisons) <= figures_per_file:
+                page_path = output_path
+            else:
+                page_path = os.path.join(output_dir, f"{base_name}_{page}{ext}")
+
+            page_figures = (next(figures) for _ in range(min(figures_per_file, len(comparisons) - start)))
+            _write_report_page(page_path, figure_divs(page_figures), plotlyjs_tag, title)
+            written.append(page_path)
+
+    print(f"✅ Generated report : {', '.join(written)}")
+    return written
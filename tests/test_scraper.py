@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import unittest
+from scraper import *
+from scraper import _parse_wages
+
+# Run from the root of the repository: python -m unittest discover tests
+
+def _core_stats(player, goals, assists):
+    return {"Player": player, "performance_gls": goals, "performance_ast": assists, "playing_time_mp": 30}
+
+class ComparisonReportTest(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+    def test_failing_comparison_is_replaced_by_a_message(self):
+        comparisons = [
+            {"stats_list": [_core_stats("A", 10, 5), _core_stats("B", 8, 7)], "season": "2022-2023", "comp": "dl", "type": "standard", "chart": "bar"},
+            # Three players cannot be drawn by compare_players_chart
+            {"stats_list": [_core_stats("C", 1, 1), _core_stats("D", 2, 2), _core_stats("E", 3, 3)], "season": "2022-2023", "comp": "dl", "type": "standard", "chart": "bar"},
+            {"stats_list": [_core_stats("A", 10, 5), _core_stats("B", 8, 7)], "season": "2022-2023", "comp": "dl", "type": "standard", "chart": "radar"},
+        ]
+        output_path = os.path.join(self.output_dir, "report.html")
+        written = generate_comparison_report(comparisons, output_path=output_path)
+
+        self.assertEqual(written, [output_path])
+        with open(output_path, encoding="utf-8") as f:
+            html = f.read()
+        self.assertIn("No common statistics to compare between C, D, E", html)
+        self.assertEqual(html.count('class="plotly-graph-div"'), 2)
+        self.assertTrue(html.rstrip().endswith("</html>"))
+
+class WagesTest(unittest.TestCase):
+    def test_currency_before_the_amount(self):
+        self.assertEqual(_parse_wages("€ 1,200,000 Annual."), (1200000, "EUR", "annual"))
+        self.assertEqual(_parse_wages("£45,000 Weekly"), (45000, "GBP", "weekly"))
+
+    def test_currency_after_the_amount(self):
+        self.assertEqual(_parse_wages("20,446,667 $ Annual."), (20446667, "USD", "annual"))
+        self.assertEqual(_parse_wages("150,000 CHF Weekly"), (150000, "CHF", "weekly"))
+
+    def test_no_amount(self):
+        self.assertEqual(_parse_wages("Unknown"), (None, None, None))
+
+    def test_player_page(self):
+        html = (
+            '<html><body><div id="meta"><h1><span>Test Player</span></h1>'
+            "<p><strong>Wages:</strong> 20,446,667 $ Annual. Contract.</p></div></body></html>"
+        )
+        info = extract_player_info(html, "https://fbref.com/en/players/abcdef12/Test-Player", "Test Player")
+        self.assertEqual((info["wage_amount"], info["wage_currency"], info["wage_period"]), (20446667, "USD", "annual"))
+
+def _season(goals, goals_per_90):
+    return {"Performance": {"Gls": goals, "G-PK": goals, "PK": "0"}, "Per 90 Minutes": {"Gls": goals_per_90, "G-PK": goals_per_90}}
+
+class TrendChartTest(unittest.TestCase):
+    trends = {
+        "A": {"2021-2022": _season("5", "0.40"), "2022-2023": _season("8", "0.55")},
+        "B": {"2022-2023": _season("3", "0.20")},
+    }
+
+    def titles(self, stats):
+        fig = compare_players_trend_chart(self.trends, stats, "dl")
+        return [annotation.text for annotation in fig.layout.annotations]
+
+    def test_label_plots_the_performance_column_only(self):
+        self.assertEqual(self.titles(["Gls"]), [stat_meaning.get("performance_gls", "performance_gls")])
+        self.assertEqual(self.titles(["PK"]), [stat_meaning.get("performance_pk", "performance_pk")])
+
+    def test_per_90_column_on_request(self):
+        self.assertEqual(
+            self.titles(["Gls", "Gls/90"]),
+            [stat_meaning.get(col, col) for col in ("performance_gls", "per_90_minutes_gls")]
+        )
+        self.assertEqual(self.titles(["per_90_minutes_g_pk"]), [stat_meaning.get("per_90_minutes_g_pk", "per_90_minutes_g_pk")])
+
+if __name__ == "__main__":
+    unittest.main()